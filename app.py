@@ -5,17 +5,22 @@ Aplicação Principal do Dashboard Streamlit
 
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
-from zoneinfo import ZoneInfo
-from datetime import datetime, timedelta
-import time
+import plotly.io as pio
+from plotly.subplots import make_subplots
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+import numpy as np
 import pandas as pd
 
-from config_manager import ConfigManager
+from config_manager import ConfigManager, LOCAL_TZ
 from data_simulator import TemperatureSimulator
 from email_notifier import EmailNotifier
 from data_logger import DataLogger
 
+# Serializar figuras Plotly com orjson (bem mais rápido que o codificador padrão)
+pio.json.config.default_engine = "orjson"
+
 # Configuração da página
 st.set_page_config(
     page_title="FAST BOMBAS - Controle de Freezer",
@@ -25,7 +30,7 @@ st.set_page_config(
 )
 
 # CSS customizado para melhor estilização
-st.markdown("""
+CUSTOM_CSS = """
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -56,7 +61,11 @@ st.markdown("""
         font-weight: bold;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+# Emitido a cada execução completa (o Streamlit descarta elementos não reenviados);
+# as atualizações periódicas rodam só o fragmento do dashboard e não o reenviam
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Inicializar estado da sessão
 def initialize_session_state():
@@ -70,6 +79,11 @@ def initialize_session_state():
     if 'notifier' not in st.session_state:
         st.session_state.notifier = EmailNotifier(st.session_state.config_manager)
     
+    # Um worker por sessão, para que uma falha de SMTP não atrase os alertas das demais
+    if 'alert_executor' not in st.session_state:
+        st.session_state.alert_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-sender")
+        st.session_state.alert_future = None
+    
     if 'logger' not in st.session_state:
         st.session_state.logger = DataLogger(st.session_state.config_manager)
     
@@ -80,7 +94,7 @@ def initialize_session_state():
         st.session_state.current_status = None
     
     if 'last_update' not in st.session_state:
-        st.session_state.last_update = datetime.now(ZoneInfo("America/Sao_Paulo"))
+        st.session_state.last_update = datetime.now(LOCAL_TZ)
 
 initialize_session_state()
 
@@ -90,29 +104,19 @@ simulator = st.session_state.simulator
 notifier = st.session_state.notifier
 logger = st.session_state.logger
 
-def create_gauge_chart(value: float, title: str, min_val: float, max_val: float, 
-                       critical_low: float, critical_high: float, 
-                       normal_min: float, normal_max: float) -> go.Figure:
+def add_gauge_to_subplot(fig: go.Figure, col: int, title: str, min_val: float, max_val: float,
+                         critical_low: float, critical_high: float,
+                         normal_min: float, normal_max: float):
     """
-    Criar gráfico de medidor para exibição de temperatura
+    Adicionar a estrutura fixa de um medidor (eixo, faixas e limite) a uma coluna da figura
     """
-    # Determinar cor baseada no valor
-    if value < critical_low or value > critical_high:
-        color = "#dc3545"  # Vermelho para crítico
-    elif value < normal_min or value > normal_max:
-        color = "#ffc107"  # Amarelo para aviso
-    else:
-        color = "#28a745"  # Verde para OK
-    
-    fig = go.Figure(go.Indicator(
+    fig.add_trace(go.Indicator(
         mode="gauge+number+delta",
-        value=value,
-        domain={'x': [0, 1], 'y': [0, 1]},
         title={'text': title, 'font': {'size': 20}},
         number={'suffix': "°C", 'font': {'size': 40}},
         gauge={
             'axis': {'range': [min_val, max_val], 'tickwidth': 1},
-            'bar': {'color': color, 'thickness': 0.75},
+            'bar': {'thickness': 0.75},
             'bgcolor': "white",
             'borderwidth': 2,
             'bordercolor': "gray",
@@ -129,7 +133,24 @@ def create_gauge_chart(value: float, title: str, min_val: float, max_val: float,
                 'value': critical_high
             }
         }
-    ))
+    ), row=1, col=col)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _build_gauges_skeleton(gauges: tuple) -> dict:
+    """
+    Construir a figura única com todos os medidores, sem valores nem cores
+    
+    O resultado depende apenas dos limites, então é serializado uma única vez;
+    os valores e as cores das barras são aplicados a cada atualização.
+    
+    Args:
+        gauges: Tupla de (título, mín_eixo, máx_eixo, crítico_baixo, crítico_alto,
+                normal_mín, normal_máx) por medidor
+    """
+    fig = make_subplots(rows=1, cols=len(gauges), specs=[[{'type': 'indicator'}] * len(gauges)])
+    
+    for col, gauge in enumerate(gauges, start=1):
+        add_gauge_to_subplot(fig, col, *gauge)
     
     fig.update_layout(
         height=300,
@@ -138,7 +159,61 @@ def create_gauge_chart(value: float, title: str, min_val: float, max_val: float,
         font={'color': "#333", 'family': "Arial"}
     )
     
-    return fig
+    return fig.to_dict()
+
+# Cor da barra do medidor por status (mesma classificação de simulator.get_status)
+_STATUS_COLORS = {
+    'OK': "#28a745",        # Verde para OK
+    'WARNING': "#ffc107",   # Amarelo para aviso
+    'CRITICAL': "#dc3545"   # Vermelho para crítico
+}
+
+def create_gauges_chart(gauges: tuple, values: list, statuses: list) -> go.Figure:
+    """
+    Criar figura com os medidores de temperatura de todas as zonas
+    
+    Uma única figura significa uma serialização e uma montagem no navegador
+    por atualização, em vez de uma por zona. A cor vem do status já calculado
+    pelo simulador, evitando repetir a comparação com os limites.
+    """
+    # st.cache_data devolve uma cópia, então a estrutura pode ser alterada livremente
+    fig_dict = _build_gauges_skeleton(gauges)
+    
+    for indicator, value, status in zip(fig_dict['data'], values, statuses):
+        indicator['value'] = value
+        indicator['gauge']['bar']['color'] = _STATUS_COLORS.get(status, _STATUS_COLORS['CRITICAL'])
+    
+    return go.Figure(fig_dict)
+
+# Máximo de pontos por série enviados ao navegador no gráfico de tendência
+TREND_MAX_POINTS = 1000
+
+def _downsample_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Selecionar índices das linhas a exibir preservando picos (mín/máx por bloco)
+    
+    Args:
+        values: Array (n, zonas) com as temperaturas em ordem cronológica
+        max_points: Número máximo aproximado de pontos a manter
+        
+    Returns:
+        Índices ordenados das linhas selecionadas
+    """
+    n, zones = values.shape
+    buckets = max(1, max_points // (2 * zones))
+    size = -(-n // buckets)
+    
+    # Completar o último bloco repetindo a última linha para permitir o reshape
+    padded = np.pad(values, ((0, buckets * size - n), (0, 0)), mode='edge')
+    blocks = padded.reshape(buckets, size, zones)
+    offsets = (np.arange(buckets) * size)[:, None]
+    
+    indices = np.concatenate([
+        (blocks.argmin(axis=1) + offsets).ravel(),
+        (blocks.argmax(axis=1) + offsets).ravel(),
+        [0, n - 1]
+    ])
+    return np.unique(np.minimum(indices, n - 1))
 
 def create_trend_chart(df: pd.DataFrame) -> go.Figure:
     """
@@ -147,31 +222,43 @@ def create_trend_chart(df: pd.DataFrame) -> go.Figure:
     fig = go.Figure()
     
     if not df.empty:
+        # Converter uma única vez para arrays NumPy (datetime64 no horário local)
+        timestamps = df['timestamp'].dt.tz_localize(None).to_numpy()
+        temps = df[['evaporator_temp', 'condenser_temp', 'ambient_temp']].to_numpy()
+        
+        # Reduzir históricos longos no servidor para manter o gráfico responsivo
+        if len(temps) > TREND_MAX_POINTS:
+            keep = _downsample_indices(temps, TREND_MAX_POINTS)
+            timestamps = timestamps[keep]
+            temps = temps[keep]
+        
+        mode = 'lines' if len(temps) > 200 else 'lines+markers'
+        
         # Temperatura do evaporador
-        fig.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['evaporator_temp'],
-            mode='lines+markers',
+        fig.add_trace(go.Scattergl(
+            x=timestamps,
+            y=temps[:, 0],
+            mode=mode,
             name='Evaporador',
             line=dict(color='#2196f3', width=2),
             marker=dict(size=6)
         ))
         
         # Temperatura do condensador
-        fig.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['condenser_temp'],
-            mode='lines+markers',
+        fig.add_trace(go.Scattergl(
+            x=timestamps,
+            y=temps[:, 1],
+            mode=mode,
             name='Condensador',
             line=dict(color='#ff9800', width=2),
             marker=dict(size=6)
         ))
         
         # Temperatura ambiente
-        fig.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['ambient_temp'],
-            mode='lines+markers',
+        fig.add_trace(go.Scattergl(
+            x=timestamps,
+            y=temps[:, 2],
+            mode=mode,
             name='Ambiente',
             line=dict(color='#4caf50', width=2),
             marker=dict(size=6)
@@ -193,16 +280,24 @@ def create_trend_chart(df: pd.DataFrame) -> go.Figure:
     
     return fig
 
+# Badges HTML de status (strings fixas, construídas uma única vez)
+_STATUS_BADGES = {
+    'OK': '<span class="status-ok">✓ OK</span>',
+    'WARNING': '<span class="status-warning">⚠ AVISO</span>',
+    'CRITICAL': '<span class="status-critical">🚨 CRÍTICO</span>'
+}
+
 def get_status_badge(status: str) -> str:
     """
     Obter badge HTML para status
     """
-    if status == 'OK':
-        return '<span class="status-ok">✓ OK</span>'
-    elif status == 'WARNING':
-        return '<span class="status-warning">⚠ AVISO</span>'
-    else:
-        return '<span class="status-critical">🚨 CRÍTICO</span>'
+    return _STATUS_BADGES.get(status, _STATUS_BADGES['CRITICAL'])
+
+def _log_alert_failure(future: Future):
+    """Registrar a falha de um envio de alerta feito em segundo plano"""
+    error = future.exception()
+    if error is not None:
+        print(f"Falha ao enviar e-mail de alerta: {error}")
 
 def update_data():
     """Atualizar leitura de temperatura e processar alertas"""
@@ -213,22 +308,107 @@ def update_data():
     # Registrar a leitura
     logger.log_reading(reading, status)
     
-    # Verificar status crítico e enviar alerta
+    # Verificar status crítico: contagens e cooldown avançam aqui, e só o envio
+    # SMTP roda em segundo plano, um por vez por sessão
     if status['overall'] == 'CRITICAL':
-        notifier.send_alert(reading, status)
+        msg = notifier.prepare_alert(reading, status)
+        pending = st.session_state.alert_future
+        if msg is not None and (pending is None or pending.done()):
+            future = st.session_state.alert_executor.submit(notifier.deliver_alert, msg)
+            future.add_done_callback(_log_alert_failure)
+            st.session_state.alert_future = future
     
     # Atualizar estado da sessão
     st.session_state.current_reading = reading
     st.session_state.current_status = status
-    st.session_state.last_update = datetime.now(ZoneInfo("America/Sao_Paulo"))
+    # A leitura já traz o horário de coleta; não é preciso consultar o relógio de novo
+    st.session_state.last_update = reading['timestamp']
+
+def _log_state(logger: DataLogger) -> tuple:
+    """
+    Estado do CSV de log (mtime em ns, tamanho), usado como chave de cache
+    
+    As leituras pendentes são gravadas antes, para que uma nova linha mude a chave.
+    """
+    logger.flush()
+    try:
+        stat = os.stat(logger.csv_file)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return 0, 0
+
+@st.cache_data(ttl=5, max_entries=8, show_spinner=False)
+def _cached_recent_readings(_logger: DataLogger, csv_file: str, log_state: tuple, count: int) -> pd.DataFrame:
+    """Leituras recentes em cache (csv_file e log_state fazem parte da chave; o logger não é hasheado)"""
+    return _logger.get_recent_readings(count)
+
+@st.cache_data(ttl=5, max_entries=8, show_spinner=False)
+def _cached_alert_table(_logger: DataLogger, csv_file: str, log_state: tuple, hours: int) -> pd.DataFrame:
+    """Tabela de alertas pronta para exibição, em cache (csv_file e log_state fazem parte da chave)"""
+    alerts = _logger.get_alert_history(hours=hours)
+    
+    if not alerts:
+        return pd.DataFrame()
+    
+    alert_df = pd.DataFrame(alerts)
+    # Formatar em C via datetime64 do NumPy em vez de strftime linha a linha
+    timestamps = alert_df['timestamp'].dt.tz_localize(None).to_numpy().astype('datetime64[s]')
+    alert_df['timestamp'] = np.char.replace(timestamps.astype(str), 'T', ' ')
+    return alert_df
+
+# Medidores exibidos: (zona, título, margem abaixo do crítico baixo, margem acima do crítico alto)
+GAUGE_ZONES = (
+    ('evaporator', "Zona do Evaporador", 5, 5),
+    ('condenser', "Zona do Condensador", 5, 10),
+    ('ambient', "Zona Ambiente", 5, 5)
+)
+
+def _build_gauge_specs(thresholds: dict) -> tuple:
+    """
+    Montar os parâmetros de cada medidor, com a faixa do eixo já calculada
+    
+    Returns:
+        Tupla de (título, mín_eixo, máx_eixo, crítico_baixo, crítico_alto,
+        normal_mín, normal_máx) por zona, na ordem de GAUGE_ZONES
+    """
+    specs = []
+    for zone, title, pad_low, pad_high in GAUGE_ZONES:
+        t = thresholds[zone]
+        specs.append((title, t.critical_low - pad_low, t.critical_high + pad_high,
+                      t.critical_low, t.critical_high, t.normal_min, t.normal_max))
+    return tuple(specs)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _dashboard_settings(_config: ConfigManager, last_modified: str) -> dict:
+    """Configurações usadas pelo dashboard, lidas uma vez por versão da configuração"""
+    return {
+        'dashboard_title': _config.get('ui_settings', 'dashboard_title'),
+        'show_advanced_metrics': _config.get('ui_settings', 'show_advanced_metrics'),
+        'location': _config.get('freezer_info', 'location'),
+        'refresh_interval': _config.get('data_collection', 'chart_refresh_interval_seconds'),
+        'max_data_points_display': _config.get('data_collection', 'max_data_points_display'),
+        'gauges': _build_gauge_specs(_config.thresholds)
+    }
+
+def get_dashboard_settings() -> dict:
+    """Obter o snapshot das configurações do dashboard para a versão atual"""
+    return _dashboard_settings(config, config.get('system_metadata', 'last_modified'))
 
 # Dashboard Principal
 def main_dashboard():
     """Página principal do dashboard"""
     
+    settings = get_dashboard_settings()
+    
     # Cabeçalho
-    dashboard_title = config.get('ui_settings', 'dashboard_title')
-    st.markdown(f'<div class="main-header">❄️ {dashboard_title}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="main-header">❄️ {settings["dashboard_title"]}</div>', unsafe_allow_html=True)
+    
+    # Auto-atualização: apenas o fragmento com os dados é reexecutado a cada intervalo
+    st.fragment(live_dashboard, run_every=settings['refresh_interval'])()
+
+def live_dashboard():
+    """Seção do dashboard atualizada periodicamente (leituras, gráficos e alertas)"""
+    settings = get_dashboard_settings()
     
     # Atualizar dados
     update_data()
@@ -252,8 +432,7 @@ def main_dashboard():
                  st.session_state.last_update.strftime("%H:%M:%S"))
     
     with col3:
-        freezer_location = config.get('freezer_info', 'location')
-        st.metric("Localização", freezer_location)
+        st.metric("Localização", settings['location'])
     
     with col4:
         if reading.get('failure_mode', False):
@@ -266,88 +445,46 @@ def main_dashboard():
     # Medidores de Temperatura
     st.subheader("📊 Leituras de Temperatura Atual")
     
-    col1, col2, col3 = st.columns(3)
+    gauges_fig = create_gauges_chart(
+        settings['gauges'],
+        [reading[f'{zone}_temp'] for zone, *_ in GAUGE_ZONES],
+        [status[zone] for zone, *_ in GAUGE_ZONES]
+    )
+    # Chave fixa: a cada atualização do fragmento o navegador atualiza o
+    # gráfico Plotly existente em vez de montar um novo
+    st.plotly_chart(gauges_fig, use_container_width=True, key="gauges")
     
-    # Medidor do evaporador
-    with col1:
-        evap_thresholds = config.get('temperature_thresholds', 'evaporator')
-        fig_evap = create_gauge_chart(
-            reading['evaporator_temp'],
-            "Zona do Evaporador",
-            evap_thresholds['critical_low'] - 5,
-            evap_thresholds['critical_high'] + 5,
-            evap_thresholds['critical_low'],
-            evap_thresholds['critical_high'],
-            evap_thresholds['min'],
-            evap_thresholds['max']
-        )
-        st.plotly_chart(fig_evap, use_container_width=True)
-        st.markdown(f"Status: {get_status_badge(status['evaporator'])}", unsafe_allow_html=True)
-    
-    # Medidor do condensador
-    with col2:
-        cond_thresholds = config.get('temperature_thresholds', 'condenser')
-        fig_cond = create_gauge_chart(
-            reading['condenser_temp'],
-            "Zona do Condensador",
-            cond_thresholds['critical_low'] - 5,
-            cond_thresholds['critical_high'] + 10,
-            cond_thresholds['critical_low'],
-            cond_thresholds['critical_high'],
-            cond_thresholds['min'],
-            cond_thresholds['max']
-        )
-        st.plotly_chart(fig_cond, use_container_width=True)
-        st.markdown(f"Status: {get_status_badge(status['condenser'])}", unsafe_allow_html=True)
-    
-    # Medidor ambiente
-    with col3:
-        amb_thresholds = config.get('temperature_thresholds', 'ambient')
-        fig_amb = create_gauge_chart(
-            reading['ambient_temp'],
-            "Zona Ambiente",
-            amb_thresholds['critical_low'] - 5,
-            amb_thresholds['critical_high'] + 5,
-            amb_thresholds['critical_low'],
-            amb_thresholds['critical_high'],
-            amb_thresholds['min'],
-            amb_thresholds['max']
-        )
-        st.plotly_chart(fig_amb, use_container_width=True)
-        st.markdown(f"Status: {get_status_badge(status['ambient'])}", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+    col1.markdown(f"Status: {get_status_badge(status['evaporator'])}", unsafe_allow_html=True)
+    col2.markdown(f"Status: {get_status_badge(status['condenser'])}", unsafe_allow_html=True)
+    col3.markdown(f"Status: {get_status_badge(status['ambient'])}", unsafe_allow_html=True)
     
     st.markdown("---")
     
     # Gráfico de Tendência de Temperatura
     st.subheader("📈 Histórico de Temperatura")
     
-    max_points = config.get('data_collection', 'max_data_points_display')
-    recent_df = logger.get_recent_readings(max_points)
+    max_points = settings['max_data_points_display']
+    log_state = _log_state(logger)
+    recent_df = _cached_recent_readings(logger, logger.csv_file, log_state, max_points)
     
     if not recent_df.empty:
         trend_fig = create_trend_chart(recent_df)
-        st.plotly_chart(trend_fig, use_container_width=True)
+        st.plotly_chart(trend_fig, use_container_width=True, key="trend_chart")
     else:
         st.info("Nenhum dado histórico disponível ainda. Os dados aparecerão conforme as leituras forem coletadas.")
     
     # Histórico de Alertas
-    if config.get('ui_settings', 'show_advanced_metrics'):
+    if settings['show_advanced_metrics']:
         st.markdown("---")
         st.subheader("🚨 Alertas Recentes")
         
-        alerts = logger.get_alert_history(hours=2)
+        alert_df = _cached_alert_table(logger, logger.csv_file, log_state, 2)
         
-        if alerts:
-            alert_df = pd.DataFrame(alerts)
-            alert_df['timestamp'] = pd.to_datetime(alert_df['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+        if not alert_df.empty:
             st.dataframe(alert_df, use_container_width=True)
         else:
             st.success("Nenhum alerta nas últimas 2 horas - Sistema operando normalmente!")
-    
-    # Auto-atualização
-    refresh_interval = config.get('data_collection', 'chart_refresh_interval_seconds')
-    time.sleep(refresh_interval)
-    st.rerun()
 
 # Navegação da Barra Lateral
 st.sidebar.title("🎛️ Navegação")
@@ -3,11 +3,139 @@ Configuration Manager Module
 Handles all system configuration settings with JSON persistence
 """
 
+import copy
 import json
 import os
+import shutil
+import threading
 from zoneinfo import ZoneInfo
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, NamedTuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# System timezone, built once and shared by every module
+LOCAL_TZ = ZoneInfo("America/Sao_Paulo")
+
+def _json_dumps(data: Dict[str, Any]) -> bytes:
+    """
+    Serialize configuration data to indented UTF-8 JSON
+    
+    Uses orjson when installed, falling back to the stdlib encoder
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _json_loads(data: bytes) -> Any:
+    """
+    Parse JSON bytes, using orjson when installed
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Version of the configuration schema stamped into system_metadata
+_SCHEMA_VERSION = "1.0"
+
+# Default configuration template (timestamps are added on each copy)
+_DEFAULT_CONFIG = {
+    # Freezer Information
+    "freezer_info": {
+        "model_name": "FAST BOMBAS Freezer Modelo X",
+        "location": "Instalação Principal de Armazenamento",
+        "operator_name": "Equipe de Operações",
+        "operator_contact": "operador@fastbombas.com"
+    },
+    
+    # Temperature Thresholds (Celsius)
+    "temperature_thresholds": {
+        "evaporator": {
+            "min": -25.0,
+            "max": -15.0,
+            "critical_high": -10.0,
+            "critical_low": -30.0
+        },
+        "condenser": {
+            "min": 20.0,
+            "max": 40.0,
+            "critical_high": 50.0,
+            "critical_low": 15.0
+        },
+        "ambient": {
+            "min": 18.0,
+            "max": 30.0,
+            "critical_high": 35.0,
+            "critical_low": 10.0
+        }
+    },
+    
+    # Data Collection Settings
+    "data_collection": {
+        "reading_interval_seconds": 5,
+        "chart_refresh_interval_seconds": 5,
+        "max_data_points_display": 30,
+        "max_historical_records": 10000
+    },
+    
+    # Alert Settings
+    "alert_settings": {
+        "enable_email_alerts": True,
+        "alert_cooldown_seconds": 300,  # Wait 5 minutes between repeat alerts
+        "consecutive_readings_trigger": 2  # Alert after 2 consecutive critical readings
+    },
+    
+    # Email Configuration
+    "email_config": {
+        "smtp_server": "smtp.gmail.com",
+        "smtp_port": 587,
+        "sender_email": "",  # User must configure
+        "recipient_emails": [],  # List of recipient emails
+        "use_tls": True
+    },
+    
+    # Data Logging
+    "data_logging": {
+        "enable_csv_logging": True,
+        "csv_file_path": "data/temperature_logs.csv",
+        "retention_days": 30,
+        "auto_export_enabled": False,
+        "export_interval_hours": 24
+    },
+    
+    # Simulation Settings (for testing)
+    "simulation": {
+        "normal_temp_evaporator_min": -20.0,
+        "normal_temp_evaporator_max": -15.0,
+        "failure_probability": 0.05,  # 5% chance of failure per reading
+        "failure_duration_seconds": 60,
+        "temp_variation_range": 0.5  # +/- 0.5°C variation
+    },
+    
+    # UI Settings
+    "ui_settings": {
+        "dashboard_title": "FAST BOMBAS - Sistema de Controle Térmico de Freezer",
+        "temperature_unit": "Celsius",  # Celsius or Fahrenheit
+        "show_advanced_metrics": True,
+        "theme_color": "blue"
+    },
+    
+    # System Metadata
+    "system_metadata": {
+        "config_version": _SCHEMA_VERSION
+        # last_modified / created_date are stamped by _get_default_config
+    }
+}
+
+class ZoneThresholds(NamedTuple):
+    """Temperature limits for a single zone (Celsius)"""
+    normal_min: float
+    normal_max: float
+    critical_low: float
+    critical_high: float
 
 class ConfigManager:
     """Manages system configuration with file persistence"""
@@ -20,7 +148,19 @@ class ConfigManager:
             config_file: Path to the JSON configuration file
         """
         self.config_file = config_file
+        self._dir = os.path.dirname(self.config_file) or "."
+        os.makedirs(self._dir, exist_ok=True)
+        self.file_exists = os.path.exists(self.config_file)
+        self._lock = threading.RLock()
+        # Error message of the last failed disk write, None once a write succeeds
+        self.last_write_error = None
+        # Incremented on every save so callers can cache values derived from the config
+        self.version = 0
+        self._paths = {}
+        self._paths_root = None
         self.config = self._load_or_create_default()
+        self.thresholds = self._build_thresholds()
+        self._build_path_index()
     
     def _get_default_config(self) -> Dict[str, Any]:
         """
@@ -29,93 +169,27 @@ class ConfigManager:
         Returns:
             Dictionary with default configuration values
         """
+        config = copy.deepcopy(_DEFAULT_CONFIG)
+        now = datetime.now(LOCAL_TZ).isoformat()
+        config["system_metadata"]["last_modified"] = now
+        config["system_metadata"]["created_date"] = now
+        return config
+    
+    def _build_thresholds(self) -> Dict[str, ZoneThresholds]:
+        """
+        Build typed threshold tuples for every zone from the current configuration
+        
+        Returns:
+            Dictionary mapping zone name to its ZoneThresholds
+        """
         return {
-            # Freezer Information
-            "freezer_info": {
-                "model_name": "FAST BOMBAS Freezer Modelo X",
-                "location": "Instalação Principal de Armazenamento",
-                "operator_name": "Equipe de Operações",
-                "operator_contact": "operador@fastbombas.com"
-            },
-            
-            # Temperature Thresholds (Celsius)
-            "temperature_thresholds": {
-                "evaporator": {
-                    "min": -25.0,
-                    "max": -15.0,
-                    "critical_high": -10.0,
-                    "critical_low": -30.0
-                },
-                "condenser": {
-                    "min": 20.0,
-                    "max": 40.0,
-                    "critical_high": 50.0,
-                    "critical_low": 15.0
-                },
-                "ambient": {
-                    "min": 18.0,
-                    "max": 30.0,
-                    "critical_high": 35.0,
-                    "critical_low": 10.0
-                }
-            },
-            
-            # Data Collection Settings
-            "data_collection": {
-                "reading_interval_seconds": 5,
-                "chart_refresh_interval_seconds": 5,
-                "max_data_points_display": 30,
-                "max_historical_records": 10000
-            },
-            
-            # Alert Settings
-            "alert_settings": {
-                "enable_email_alerts": True,
-                "alert_cooldown_seconds": 300,  # Wait 5 minutes between repeat alerts
-                "consecutive_readings_trigger": 2  # Alert after 2 consecutive critical readings
-            },
-            
-            # Email Configuration
-            "email_config": {
-                "smtp_server": "smtp.gmail.com",
-                "smtp_port": 587,
-                "sender_email": "",  # User must configure
-                "recipient_emails": [],  # List of recipient emails
-                "use_tls": True
-            },
-            
-            # Data Logging
-            "data_logging": {
-                "enable_csv_logging": True,
-                "csv_file_path": "data/temperature_logs.csv",
-                "retention_days": 30,
-                "auto_export_enabled": False,
-                "export_interval_hours": 24
-            },
-            
-            # Simulation Settings (for testing)
-            "simulation": {
-                "normal_temp_evaporator_min": -20.0,
-                "normal_temp_evaporator_max": -15.0,
-                "failure_probability": 0.05,  # 5% chance of failure per reading
-                "failure_duration_seconds": 60,
-                "temp_variation_range": 0.5  # +/- 0.5°C variation
-            },
-            
-            # UI Settings
-            "ui_settings": {
-                "dashboard_title": "FAST BOMBAS - Sistema de Controle Térmico de Freezer",
-                "temperature_unit": "Celsius",  # Celsius or Fahrenheit
-                "show_advanced_metrics": True,
-                "theme_color": "blue"
-            },
-            
-            # System Metadata
-            "system_metadata": {
-                "config_version": "1.0",
-                "last_modified": datetime.now(ZoneInfo("America/Sao_Paulo")).isoformat(),
-                "created_date": datetime.now(ZoneInfo("America/Sao_Paulo")).isoformat()
-            }
+            zone: ZoneThresholds(
+                normal_min=float(limits['min']),
+                normal_max=float(limits['max']),
+                critical_low=float(limits['critical_low']),
+                critical_high=float(limits['critical_high'])
+            )
+            for zone, limits in self.config["temperature_thresholds"].items()
         }
     
     def _load_or_create_default(self) -> Dict[str, Any]:
@@ -125,11 +199,12 @@ class ConfigManager:
         Returns:
             Configuration dictionary
         """
-        if os.path.exists(self.config_file):
+        if self.file_exists:
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    # Merge with defaults to ensure new keys are added
+                with open(self.config_file, 'rb') as f:
+                    config = _json_loads(f.read())
+                    # Always merge with defaults: the file may be hand-edited or
+                    # missing keys even when stamped with the current schema version
                     default_config = self._get_default_config()
                     merged_config = self._deep_merge(default_config, config)
                     return merged_config
@@ -145,28 +220,42 @@ class ConfigManager:
     
     def _deep_merge(self, default: Dict, user: Dict) -> Dict:
         """
-        Deep merge user config with default config
-        Ensures new default keys are added while preserving user values
+        Deep merge user config into default config (in place)
+        Ensures new default keys are added while preserving user values,
+        default sections are never replaced by non-dict values, and integer
+        values for float defaults are stored as floats
         
         Args:
-            default: Default configuration dictionary
+            default: Default configuration dictionary (a fresh copy; mutated and returned)
             user: User configuration dictionary
             
         Returns:
             Merged configuration dictionary
         """
-        result = default.copy()
-        for key, value in user.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                result[key] = self._deep_merge(result[key], value)
-            else:
-                result[key] = value
-        return result
+        # Walk nested sections with an explicit stack instead of recursing
+        stack = [(default, user)]
+        while stack:
+            target, source = stack.pop()
+            for key, value in source.items():
+                current = target.get(key)
+                if isinstance(current, dict):
+                    # A section replaced by a non-dict value keeps its defaults
+                    if isinstance(value, dict):
+                        stack.append((current, value))
+                elif isinstance(current, float) and isinstance(value, int) and not isinstance(value, bool):
+                    # Keep float settings as floats even if the file stores them as integers
+                    target[key] = float(value)
+                else:
+                    target[key] = value
+        return default
     
     def save_config(self, config: Dict[str, Any] = None) -> bool:
         """
         Save configuration to file
         
+        The result reflects the disk write; on failure the in-memory
+        configuration keeps the change and the error is kept in last_write_error.
+        
         Args:
             config: Configuration dictionary to save (uses self.config if None)
             
@@ -177,21 +266,89 @@ class ConfigManager:
             config = self.config
         
         try:
-            # Update last modified timestamp
-            config["system_metadata"]["last_modified"] = datetime.now(ZoneInfo("America/Sao_Paulo")).isoformat()
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.config_file) if os.path.dirname(self.config_file) else ".", exist_ok=True)
+            with self._lock:
+                # Update last modified timestamp; cached UI helpers take it as
+                # an argument, so every save invalidates them
+                config["system_metadata"]["last_modified"] = datetime.now(LOCAL_TZ).isoformat()
+                
+                self.config = config
+                self.thresholds = self._build_thresholds()
+                if config is not self._paths_root:
+                    self._build_path_index()
+                self.version += 1
+                return self._write_to_disk(config)
+        except Exception as e:
+            print(f"Error saving config: {e}")
+            self.last_write_error = str(e)
+            return False
+    
+    def _write_to_disk(self, config: Dict[str, Any]) -> bool:
+        """
+        Write a configuration dictionary to the config file
+        
+        Args:
+            config: Configuration dictionary to write
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+        Returns:
+            True if successful, False otherwise
+        """
+        tmp_path = None
+        try:
+            data = _json_dumps(config)
             
-            self.config = config
+            # Write to a temporary file and rename it over the target, so a
+            # crash mid-write never leaves a truncated config behind. The temp file
+            # is created 0666 so the kernel applies the umask like a plain open();
+            # an existing file's permissions are copied over before the rename
+            path = os.path.join(self._dir, f".cfg{os.urandom(8).hex()}.tmp")
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+            tmp_path = path
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(self.config_file):
+                shutil.copymode(self.config_file, tmp_path)
+            os.replace(tmp_path, self.config_file)
+            self.file_exists = True
+            self.last_write_error = None
             return True
         except Exception as e:
             print(f"Error saving config: {e}")
+            self.last_write_error = str(e)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
             return False
     
+    def to_json_bytes(self) -> bytes:
+        """
+        Serialize the current configuration as it will be written to disk
+        
+        Returns:
+            Indented UTF-8 JSON bytes
+        """
+        with self._lock:
+            return _json_dumps(self.config)
+    
+    def _build_path_index(self):
+        """
+        Index every key path in the configuration to its parent dict and final key
+        
+        Lets get() and set() resolve a path with one hash lookup instead of
+        walking the nested dictionaries.
+        """
+        index = {}
+        stack = [((), self.config)]
+        while stack:
+            prefix, node = stack.pop()
+            for key, value in node.items():
+                path = prefix + (key,)
+                index[path] = (node, key)
+                if isinstance(value, dict):
+                    stack.append((path, value))
+        self._paths = index
+        self._paths_root = self.config
+    
     def get(self, *keys) -> Any:
         """
         Get configuration value using dot notation
@@ -202,29 +359,30 @@ class ConfigManager:
         Returns:
             Configuration value or None if not found
         """
-        value = self.config
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return None
-        return value
+        if not keys:
+            return self.config
+        entry = self._paths.get(keys)
+        if entry is None:
+            return None
+        parent, key = entry
+        return parent.get(key)
     
-    def set(self, *keys_and_value) -> bool:
+    def _assign(self, keys, value):
         """
-        Set configuration value using dot notation
+        Set a value in the in-memory configuration without saving
         
         Args:
-            *keys_and_value: Keys and final value (e.g., set('email_config', 'smtp_port', 587))
-            
-        Returns:
-            True if successful, False otherwise
+            keys: Sequence of keys leading to the value
+            value: Value to store
         """
-        if len(keys_and_value) < 2:
-            return False
-        
-        keys = keys_and_value[:-1]
-        value = keys_and_value[-1]
+        keys = tuple(keys)
+        entry = self._paths.get(keys)
+        if entry is not None:
+            parent, key = entry
+            # Replacing a leaf with a leaf leaves every indexed path valid
+            if not isinstance(value, dict) and not isinstance(parent.get(key), dict):
+                parent[key] = value
+                return
         
         # Navigate to the parent dictionary
         current = self.config
@@ -235,6 +393,39 @@ class ConfigManager:
         
         # Set the value
         current[keys[-1]] = value
+        self._build_path_index()
+    
+    def set(self, *keys_and_value) -> bool:
+        """
+        Set configuration value using dot notation
+        
+        Args:
+            *keys_and_value: Keys and final value (e.g., set('email_config', 'smtp_port', 587))
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if len(keys_and_value) < 2:
+            return False
+        
+        with self._lock:
+            self._assign(keys_and_value[:-1], keys_and_value[-1])
+        return self.save_config()
+    
+    def set_many(self, updates) -> bool:
+        """
+        Set several configuration values and save them in a single write
+        
+        Args:
+            updates: Iterable of (keys_tuple, value) pairs
+                     (e.g., [(('email_config', 'smtp_port'), 587), ...])
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        with self._lock:
+            for keys, value in updates:
+                self._assign(keys, value)
         return self.save_config()
     
     def reset_to_default(self) -> bool:
@@ -258,8 +449,10 @@ class ConfigManager:
             True if successful, False otherwise
         """
         try:
-            with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
+            # Encode before opening so a failure never truncates the target
+            payload = self.to_json_bytes()
+            with open(export_path, 'wb') as f:
+                f.write(payload)
             return True
         except Exception as e:
             print(f"Error exporting config: {e}")
@@ -276,8 +469,8 @@ class ConfigManager:
             True if successful, False otherwise
         """
         try:
-            with open(import_path, 'r', encoding='utf-8') as f:
-                imported_config = json.load(f)
+            with open(import_path, 'rb') as f:
+                imported_config = _json_loads(f.read())
             
             # Merge with defaults to ensure completeness
             default_config = self._get_default_config()
@@ -4,238 +4,255 @@ Fornece UI para ajustar todas as configurações do sistema
 """
 
 import streamlit as st
-from config_manager import ConfigManager
+from config_manager import ConfigManager, LOCAL_TZ
+from email_notifier import EmailNotifier
 import os
-from zoneinfo import ZoneInfo
 from datetime import datetime
 
+# Seções do painel de configuração, na ordem de exibição
+CONFIG_SECTIONS = (
+    "Info do Freezer",
+    "Limites de Temperatura",
+    "Coleta de Dados",
+    "Alertas por E-mail",
+    "Registro de Dados",
+    "Simulação",
+    "Avançado"
+)
+
+def _as_percent(value):
+    """Converter uma fração (0-1) em porcentagem para exibição"""
+    return value * 100
+
+# Zonas de temperatura: (chave na configuração, prefixo das chaves dos widgets, rótulo)
+THRESHOLD_ZONES = (
+    ('evaporator', 'evap', "Zona do Evaporador"),
+    ('condenser', 'cond', "Zona do Condensador"),
+    ('ambient', 'amb', "Zona Ambiente")
+)
+
+# Limites de cada zona: (coluna, chave na configuração, sufixo da chave do widget, rótulo)
+THRESHOLD_FIELDS = (
+    (0, 'min', 'min', "Mín Normal (°C)"),
+    (0, 'critical_low', 'crit_low', "Crítico Baixo (°C)"),
+    (1, 'max', 'max', "Máx Normal (°C)"),
+    (1, 'critical_high', 'crit_high', "Crítico Alto (°C)")
+)
+
+# Chave do widget -> (caminho na configuração, conversão para o valor exibido)
+CONFIG_WIDGETS = {
+    "freezer_model_name": (('freezer_info', 'model_name'), None),
+    "freezer_location": (('freezer_info', 'location'), None),
+    "freezer_operator_name": (('freezer_info', 'operator_name'), None),
+    "freezer_operator_contact": (('freezer_info', 'operator_contact'), None),
+    **{
+        f"{prefix}_{suffix}": (('temperature_thresholds', zone, field), float)
+        for zone, prefix, _ in THRESHOLD_ZONES
+        for _, field, suffix, _ in THRESHOLD_FIELDS
+    },
+    "collection_reading_interval": (('data_collection', 'reading_interval_seconds'), None),
+    "collection_refresh_interval": (('data_collection', 'chart_refresh_interval_seconds'), None),
+    "collection_max_points": (('data_collection', 'max_data_points_display'), None),
+    "alert_enable_email": (('alert_settings', 'enable_email_alerts'), None),
+    "alert_cooldown": (('alert_settings', 'alert_cooldown_seconds'), None),
+    "alert_consecutive_readings": (('alert_settings', 'consecutive_readings_trigger'), None),
+    "email_smtp_server": (('email_config', 'smtp_server'), None),
+    "email_smtp_port": (('email_config', 'smtp_port'), None),
+    "email_sender": (('email_config', 'sender_email'), None),
+    "email_use_tls": (('email_config', 'use_tls'), None),
+    "email_recipients": (('email_config', 'recipient_emails'), '\n'.join),
+    "logging_enable_csv": (('data_logging', 'enable_csv_logging'), None),
+    "logging_csv_path": (('data_logging', 'csv_file_path'), None),
+    "logging_retention_days": (('data_logging', 'retention_days'), None),
+    "sim_normal_min": (('simulation', 'normal_temp_evaporator_min'), float),
+    "sim_normal_max": (('simulation', 'normal_temp_evaporator_max'), float),
+    "sim_failure_prob": (('simulation', 'failure_probability'), _as_percent),
+    "sim_failure_duration": (('simulation', 'failure_duration_seconds'), None),
+    "sim_temp_variation": (('simulation', 'temp_variation_range'), float),
+    "ui_dashboard_title": (('ui_settings', 'dashboard_title'), None),
+    "ui_show_advanced": (('ui_settings', 'show_advanced_metrics'), None)
+}
+
+def _seed_widget_state(config: ConfigManager):
+    """
+    Preencher o session_state dos widgets a partir da configuração
+    
+    Os valores são recarregados quando a versão da configuração muda (save,
+    redefinição ou importação); nos demais reruns apenas chaves ausentes
+    são preenchidas, sem reler a configuração para cada widget.
+    """
+    reload_all = st.session_state.get('config_widgets_version') != config.version
+    for key, (path, convert) in CONFIG_WIDGETS.items():
+        if reload_all or key not in st.session_state:
+            value = config.get(*path)
+            st.session_state[key] = convert(value) if convert is not None else value
+    st.session_state.config_widgets_version = config.version
+
+def _show_save_result(config: ConfigManager, saved: bool, message: str):
+    """Mostrar a mensagem de sucesso, ou o erro de gravação quando o save falhou"""
+    if saved:
+        st.success(message)
+    else:
+        detail = f": {config.last_write_error}" if config.last_write_error else ""
+        st.error(f"✗ Falha ao salvar a configuração{detail}")
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _config_file_bytes(_config: ConfigManager, last_modified: str) -> bytes:
+    """Conteúdo do arquivo de configuração para download, gerado uma vez por versão"""
+    return _config.to_json_bytes()
+
 def show_configuration_panel(config: ConfigManager):
     """Exibir painel de configuração para todas as configurações do sistema"""
     st.title("⚙️ Configuração do Sistema")
     st.markdown("Personalize todas as configurações de monitoramento do freezer para atender seus requisitos específicos.")
     
-    # Criar abas para diferentes seções de configuração
-    tabs = st.tabs([
-        "Info do Freezer",
-        "Limites de Temperatura",
-        "Coleta de Dados",
-        "Alertas por E-mail",
-        "Registro de Dados",
-        "Simulação",
-        "Avançado"
-    ])
+    # Valores iniciais dos widgets vêm do session_state, preenchido a partir da configuração
+    _seed_widget_state(config)
     
-    # Aba 1: Informações do Freezer
-    with tabs[0]:
-        st.subheader("🏭 Informações do Freezer")
-        st.markdown("Informações básicas sobre a instalação do seu freezer")
-        
+    # Seletor de seção: apenas a seção ativa tem seus widgets construídos a cada rerun
+    section = st.radio(
+        "Seção",
+        CONFIG_SECTIONS,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="config_section"
+    )
+    
+    # Cada seção é um fragment: salvar reexecuta só a seção, não o app inteiro
+    SECTION_RENDERERS[section](config)
+
+@st.fragment
+def _render_freezer_info(config: ConfigManager):
+    """Seção de informações do freezer"""
+    st.subheader("🏭 Informações do Freezer")
+    st.markdown("Informações básicas sobre a instalação do seu freezer")
+    
+    with st.form(key="form_freezer_info"):
         model_name = st.text_input(
             "Nome do Modelo do Freezer",
-            value=config.get('freezer_info', 'model_name'),
-            help="Digite o nome do modelo ou identificador deste freezer"
+            help="Digite o nome do modelo ou identificador deste freezer",
+            key="freezer_model_name"
         )
         
         location = st.text_input(
             "Local de Instalação",
-            value=config.get('freezer_info', 'location'),
-            help="Localização física onde o freezer está instalado"
+            help="Localização física onde o freezer está instalado",
+            key="freezer_location"
         )
         
         operator_name = st.text_input(
             "Nome do Operador",
-            value=config.get('freezer_info', 'operator_name'),
-            help="Nome da pessoa ou equipe responsável"
+            help="Nome da pessoa ou equipe responsável",
+            key="freezer_operator_name"
         )
         
         operator_contact = st.text_input(
             "E-mail de Contato do Operador",
-            value=config.get('freezer_info', 'operator_contact'),
-            help="Endereço de e-mail do operador responsável"
+            help="Endereço de e-mail do operador responsável",
+            key="freezer_operator_contact"
         )
         
-        if st.button("Salvar Info do Freezer", key="save_freezer_info"):
-            config.set('freezer_info', 'model_name', model_name)
-            config.set('freezer_info', 'location', location)
-            config.set('freezer_info', 'operator_name', operator_name)
-            config.set('freezer_info', 'operator_contact', operator_contact)
-            st.success("✓ Informações do freezer salvas com sucesso!")
+        if st.form_submit_button("Salvar Info do Freezer", key="save_freezer_info"):
+            saved = config.set_many([
+                (('freezer_info', 'model_name'), model_name),
+                (('freezer_info', 'location'), location),
+                (('freezer_info', 'operator_name'), operator_name),
+                (('freezer_info', 'operator_contact'), operator_contact)
+            ])
+            _show_save_result(config, saved, "✓ Informações do freezer salvas com sucesso!")
+
+@st.fragment
+def _render_temperature_thresholds(config: ConfigManager):
+    """Seção de limites de temperatura"""
+    st.subheader("🌡️ Limites de Temperatura")
+    st.markdown("Configure os limites de temperatura para cada zona. Limites críticos acionam alertas.")
     
-    # Aba 2: Limites de Temperatura
-    with tabs[1]:
-        st.subheader("🌡️ Limites de Temperatura")
-        st.markdown("Configure os limites de temperatura para cada zona. Limites críticos acionam alertas.")
-        
-        # Zona do Evaporador
-        st.markdown("**Zona do Evaporador**")
-        col1, col2 = st.columns(2)
-        with col1:
-            evap_min = st.number_input(
-                "Mín Normal (°C)",
-                value=float(config.get('temperature_thresholds', 'evaporator', 'min')),
-                step=0.5,
-                key="evap_min"
-            )
-            evap_critical_low = st.number_input(
-                "Crítico Baixo (°C)",
-                value=float(config.get('temperature_thresholds', 'evaporator', 'critical_low')),
-                step=0.5,
-                key="evap_crit_low"
-            )
-        with col2:
-            evap_max = st.number_input(
-                "Máx Normal (°C)",
-                value=float(config.get('temperature_thresholds', 'evaporator', 'max')),
-                step=0.5,
-                key="evap_max"
-            )
-            evap_critical_high = st.number_input(
-                "Crítico Alto (°C)",
-                value=float(config.get('temperature_thresholds', 'evaporator', 'critical_high')),
-                step=0.5,
-                key="evap_crit_high"
-            )
-        
-        st.markdown("---")
-        
-        # Zona do Condensador
-        st.markdown("**Zona do Condensador**")
-        col1, col2 = st.columns(2)
-        with col1:
-            cond_min = st.number_input(
-                "Mín Normal (°C)",
-                value=float(config.get('temperature_thresholds', 'condenser', 'min')),
-                step=0.5,
-                key="cond_min"
-            )
-            cond_critical_low = st.number_input(
-                "Crítico Baixo (°C)",
-                value=float(config.get('temperature_thresholds', 'condenser', 'critical_low')),
-                step=0.5,
-                key="cond_crit_low"
-            )
-        with col2:
-            cond_max = st.number_input(
-                "Máx Normal (°C)",
-                value=float(config.get('temperature_thresholds', 'condenser', 'max')),
-                step=0.5,
-                key="cond_max"
-            )
-            cond_critical_high = st.number_input(
-                "Crítico Alto (°C)",
-                value=float(config.get('temperature_thresholds', 'condenser', 'critical_high')),
-                step=0.5,
-                key="cond_crit_high"
-            )
-        
-        st.markdown("---")
-        
-        # Zona Ambiente
-        st.markdown("**Zona Ambiente**")
-        col1, col2 = st.columns(2)
-        with col1:
-            amb_min = st.number_input(
-                "Mín Normal (°C)",
-                value=float(config.get('temperature_thresholds', 'ambient', 'min')),
-                step=0.5,
-                key="amb_min"
-            )
-            amb_critical_low = st.number_input(
-                "Crítico Baixo (°C)",
-                value=float(config.get('temperature_thresholds', 'ambient', 'critical_low')),
-                step=0.5,
-                key="amb_crit_low"
-            )
-        with col2:
-            amb_max = st.number_input(
-                "Máx Normal (°C)",
-                value=float(config.get('temperature_thresholds', 'ambient', 'max')),
-                step=0.5,
-                key="amb_max"
-            )
-            amb_critical_high = st.number_input(
-                "Crítico Alto (°C)",
-                value=float(config.get('temperature_thresholds', 'ambient', 'critical_high')),
-                step=0.5,
-                key="amb_crit_high"
-            )
-        
-        if st.button("Salvar Limites de Temperatura", key="save_temp_thresholds"):
-            config.set('temperature_thresholds', 'evaporator', 'min', evap_min)
-            config.set('temperature_thresholds', 'evaporator', 'max', evap_max)
-            config.set('temperature_thresholds', 'evaporator', 'critical_low', evap_critical_low)
-            config.set('temperature_thresholds', 'evaporator', 'critical_high', evap_critical_high)
-            config.set('temperature_thresholds', 'condenser', 'min', cond_min)
-            config.set('temperature_thresholds', 'condenser', 'max', cond_max)
-            config.set('temperature_thresholds', 'condenser', 'critical_low', cond_critical_low)
-            config.set('temperature_thresholds', 'condenser', 'critical_high', cond_critical_high)
-            config.set('temperature_thresholds', 'ambient', 'min', amb_min)
-            config.set('temperature_thresholds', 'ambient', 'max', amb_max)
-            config.set('temperature_thresholds', 'ambient', 'critical_low', amb_critical_low)
-            config.set('temperature_thresholds', 'ambient', 'critical_high', amb_critical_high)
-            st.success("✓ Limites de temperatura salvos com sucesso!")
+    with st.form(key="form_temp_thresholds"):
+        for index, (_, prefix, zone_label) in enumerate(THRESHOLD_ZONES):
+            if index > 0:
+                st.markdown("---")
+            
+            st.markdown(f"**{zone_label}**")
+            columns = st.columns(2)
+            for column, field, suffix, label in THRESHOLD_FIELDS:
+                with columns[column]:
+                    st.number_input(label, step=0.5, key=f"{prefix}_{suffix}")
+        
+        if st.form_submit_button("Salvar Limites de Temperatura", key="save_temp_thresholds"):
+            saved = config.set_many([
+                (('temperature_thresholds', zone, field), st.session_state[f"{prefix}_{suffix}"])
+                for zone, prefix, _ in THRESHOLD_ZONES
+                for _, field, suffix, _ in THRESHOLD_FIELDS
+            ])
+            _show_save_result(config, saved, "✓ Limites de temperatura salvos com sucesso!")
+
+@st.fragment
+def _render_data_collection(config: ConfigManager):
+    """Seção de coleta de dados"""
+    st.subheader("📡 Configurações de Coleta de Dados")
+    st.markdown("Configure a frequência de coleta e exibição de dados")
     
-    # Aba 3: Coleta de Dados
-    with tabs[2]:
-        st.subheader("📡 Configurações de Coleta de Dados")
-        st.markdown("Configure a frequência de coleta e exibição de dados")
-        
+    with st.form(key="form_data_collection"):
         reading_interval = st.number_input(
             "Intervalo de Leitura (segundos)",
             min_value=1,
             max_value=60,
-            value=config.get('data_collection', 'reading_interval_seconds'),
-            help="Com que frequência coletar leituras de temperatura"
+            help="Com que frequência coletar leituras de temperatura",
+            key="collection_reading_interval"
         )
         
         refresh_interval = st.number_input(
             "Intervalo de Atualização do Dashboard (segundos)",
             min_value=1,
             max_value=60,
-            value=config.get('data_collection', 'chart_refresh_interval_seconds'),
-            help="Com que frequência atualizar a exibição do dashboard"
+            help="Com que frequência atualizar a exibição do dashboard",
+            key="collection_refresh_interval"
         )
         
         max_points = st.number_input(
             "Máximo de Pontos de Dados no Gráfico",
             min_value=10,
             max_value=100,
-            value=config.get('data_collection', 'max_data_points_display'),
-            help="Número de leituras recentes a mostrar nos gráficos de tendência"
+            help="Número de leituras recentes a mostrar nos gráficos de tendência",
+            key="collection_max_points"
         )
         
-        if st.button("Salvar Configurações de Coleta", key="save_data_collection"):
-            config.set('data_collection', 'reading_interval_seconds', reading_interval)
-            config.set('data_collection', 'chart_refresh_interval_seconds', refresh_interval)
-            config.set('data_collection', 'max_data_points_display', max_points)
-            st.success("✓ Configurações de coleta salvas com sucesso!")
+        if st.form_submit_button("Salvar Configurações de Coleta", key="save_data_collection"):
+            saved = config.set_many([
+                (('data_collection', 'reading_interval_seconds'), reading_interval),
+                (('data_collection', 'chart_refresh_interval_seconds'), refresh_interval),
+                (('data_collection', 'max_data_points_display'), max_points)
+            ])
+            _show_save_result(config, saved, "✓ Configurações de coleta salvas com sucesso!")
+
+@st.fragment
+def _render_email_alerts(config: ConfigManager):
+    """Seção de alertas por e-mail"""
+    st.subheader("📧 Configuração de Alertas por E-mail")
+    st.markdown("Configure notificações automáticas por e-mail para eventos críticos")
     
-    # Aba 4: Alertas por E-mail
-    with tabs[3]:
-        st.subheader("📧 Configuração de Alertas por E-mail")
-        st.markdown("Configure notificações automáticas por e-mail para eventos críticos")
-        
+    with st.form(key="form_email_config"):
         enable_email = st.checkbox(
             "Ativar Alertas por E-mail",
-            value=config.get('alert_settings', 'enable_email_alerts'),
-            help="Ativar ou desativar notificações por e-mail"
+            help="Ativar ou desativar notificações por e-mail",
+            key="alert_enable_email"
         )
         
         alert_cooldown = st.number_input(
             "Período de Espera entre Alertas (segundos)",
             min_value=60,
             max_value=3600,
-            value=config.get('alert_settings', 'alert_cooldown_seconds'),
             step=60,
-            help="Tempo mínimo entre alertas repetidos"
+            help="Tempo mínimo entre alertas repetidos",
+            key="alert_cooldown"
         )
         
         consecutive_readings = st.number_input(
             "Leituras Críticas Consecutivas para Acionar Alerta",
             min_value=1,
             max_value=10,
-            value=config.get('alert_settings', 'consecutive_readings_trigger'),
-            help="Número de leituras críticas consecutivas antes de enviar alerta"
+            help="Número de leituras críticas consecutivas antes de enviar alerta",
+            key="alert_consecutive_readings"
         )
         
         st.markdown("---")
@@ -243,22 +260,22 @@ def show_configuration_panel(config: ConfigManager):
         
         smtp_server = st.text_input(
             "Servidor SMTP",
-            value=config.get('email_config', 'smtp_server'),
-            help="Endereço do servidor SMTP (ex: smtp.gmail.com)"
+            help="Endereço do servidor SMTP (ex: smtp.gmail.com)",
+            key="email_smtp_server"
         )
         
         smtp_port = st.number_input(
             "Porta SMTP",
             min_value=1,
             max_value=65535,
-            value=config.get('email_config', 'smtp_port'),
-            help="Porta SMTP (geralmente 587 para TLS)"
+            help="Porta SMTP (geralmente 587 para TLS)",
+            key="email_smtp_port"
         )
         
         sender_email = st.text_input(
             "Endereço de E-mail Remetente",
-            value=config.get('email_config', 'sender_email'),
-            help="Endereço de e-mail para enviar alertas"
+            help="Endereço de e-mail para enviar alertas",
+            key="email_sender"
         )
         
         st.info("🔒 A senha SMTP deve ser definida como variável de ambiente 'SMTP_PASSWORD' por segurança. Nunca armazene senhas em arquivos de configuração!")
@@ -268,175 +285,206 @@ def show_configuration_panel(config: ConfigManager):
         
         use_tls = st.checkbox(
             "Usar Criptografia TLS",
-            value=config.get('email_config', 'use_tls'),
-            help="Ativar TLS para transmissão segura de e-mail"
+            help="Ativar TLS para transmissão segura de e-mail",
+            key="email_use_tls"
         )
         
         recipient_emails_text = st.text_area(
             "Endereços de E-mail Destinatários (um por linha)",
-            value='\n'.join(config.get('email_config', 'recipient_emails')),
-            help="Digite endereços de e-mail para receber alertas, um por linha"
+            help="Digite endereços de e-mail para receber alertas, um por linha",
+            key="email_recipients"
         )
         
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if st.button("Salvar Configuração de E-mail", key="save_email_config"):
-                config.set('alert_settings', 'enable_email_alerts', enable_email)
-                config.set('alert_settings', 'alert_cooldown_seconds', alert_cooldown)
-                config.set('alert_settings', 'consecutive_readings_trigger', consecutive_readings)
-                config.set('email_config', 'smtp_server', smtp_server)
-                config.set('email_config', 'smtp_port', smtp_port)
-                config.set('email_config', 'sender_email', sender_email)
-                config.set('email_config', 'use_tls', use_tls)
-                recipients = [email.strip() for email in recipient_emails_text.split('\n') if email.strip()]
-                config.set('email_config', 'recipient_emails', recipients)
-                st.success("✓ Configuração de e-mail salva com sucesso!")
-                st.info("Lembre-se: Defina a variável de ambiente SMTP_PASSWORD para ativar alertas por e-mail")
-        
-        with col2:
-            if st.button("Testar Conexão de E-mail", key="test_email"):
-                from email_notifier import EmailNotifier
-                test_notifier = EmailNotifier(config)
-                success, message = test_notifier.test_email_connection()
-                if success:
-                    st.success(f"✓ {message}")
-                else:
-                    st.error(f"✗ {message}")
+        if st.form_submit_button("Salvar Configuração de E-mail", key="save_email_config"):
+            recipients = [email for email in map(str.strip, recipient_emails_text.splitlines()) if email]
+            saved = config.set_many([
+                (('alert_settings', 'enable_email_alerts'), enable_email),
+                (('alert_settings', 'alert_cooldown_seconds'), alert_cooldown),
+                (('alert_settings', 'consecutive_readings_trigger'), consecutive_readings),
+                (('email_config', 'smtp_server'), smtp_server),
+                (('email_config', 'smtp_port'), smtp_port),
+                (('email_config', 'sender_email'), sender_email),
+                (('email_config', 'use_tls'), use_tls),
+                (('email_config', 'recipient_emails'), recipients)
+            ])
+            _show_save_result(config, saved, "✓ Configuração de e-mail salva com sucesso!")
+            st.info("Lembre-se: Defina a variável de ambiente SMTP_PASSWORD para ativar alertas por e-mail")
     
-    # Aba 5: Registro de Dados
-    with tabs[4]:
-        st.subheader("💾 Configurações de Registro de Dados")
-        st.markdown("Configure como os dados de temperatura são registrados em arquivos")
-        
+    # Botões comuns não são permitidos dentro de formulários
+    if st.button("Testar Conexão de E-mail", key="test_email"):
+        # Reutiliza o notificador da sessão; ele lê a configuração atual a cada envio
+        test_notifier = st.session_state.get('notifier')
+        if test_notifier is None:
+            test_notifier = st.session_state.notifier = EmailNotifier(config)
+        success, message = test_notifier.test_email_connection()
+        if success:
+            st.success(f"✓ {message}")
+        else:
+            st.error(f"✗ {message}")
+
+@st.fragment
+def _render_data_logging(config: ConfigManager):
+    """Seção de registro de dados"""
+    st.subheader("💾 Configurações de Registro de Dados")
+    st.markdown("Configure como os dados de temperatura são registrados em arquivos")
+    
+    with st.form(key="form_logging"):
         enable_logging = st.checkbox(
             "Ativar Registro em CSV",
-            value=config.get('data_logging', 'enable_csv_logging'),
-            help="Salvar todas as leituras em arquivo CSV"
+            help="Salvar todas as leituras em arquivo CSV",
+            key="logging_enable_csv"
         )
         
         csv_path = st.text_input(
             "Caminho do Arquivo CSV",
-            value=config.get('data_logging', 'csv_file_path'),
-            help="Caminho onde o arquivo de log CSV será salvo"
+            help="Caminho onde o arquivo de log CSV será salvo",
+            key="logging_csv_path"
         )
         
         retention_days = st.number_input(
             "Período de Retenção de Dados (dias)",
             min_value=1,
             max_value=365,
-            value=config.get('data_logging', 'retention_days'),
-            help="Número de dias para manter dados históricos"
+            help="Número de dias para manter dados históricos",
+            key="logging_retention_days"
         )
         
-        if st.button("Salvar Configurações de Registro", key="save_logging"):
-            config.set('data_logging', 'enable_csv_logging', enable_logging)
-            config.set('data_logging', 'csv_file_path', csv_path)
-            config.set('data_logging', 'retention_days', retention_days)
-            st.success("✓ Configurações de registro salvas com sucesso!")
+        if st.form_submit_button("Salvar Configurações de Registro", key="save_logging"):
+            saved = config.set_many([
+                (('data_logging', 'enable_csv_logging'), enable_logging),
+                (('data_logging', 'csv_file_path'), csv_path),
+                (('data_logging', 'retention_days'), retention_days)
+            ])
+            _show_save_result(config, saved, "✓ Configurações de registro salvas com sucesso!")
+
+@st.fragment
+def _render_simulation(config: ConfigManager):
+    """Seção de configurações de simulação"""
+    st.subheader("🔬 Configurações de Simulação")
+    st.markdown("Configure o comportamento do simulador de temperatura (para testes)")
     
-    # Aba 6: Configurações de Simulação
-    with tabs[5]:
-        st.subheader("🔬 Configurações de Simulação")
-        st.markdown("Configure o comportamento do simulador de temperatura (para testes)")
-        
-        st.info("Estas configurações controlam o gerador de dados de temperatura simulados usado para testar o sistema.")
-        
+    st.info("Estas configurações controlam o gerador de dados de temperatura simulados usado para testar o sistema.")
+    
+    with st.form(key="form_simulation"):
         sim_min = st.number_input(
             "Temperatura Normal Mín (°C)",
-            value=float(config.get('simulation', 'normal_temp_evaporator_min')),
             step=0.5,
-            help="Temperatura operacional normal mínima para evaporador"
+            help="Temperatura operacional normal mínima para evaporador",
+            key="sim_normal_min"
         )
         
         sim_max = st.number_input(
             "Temperatura Normal Máx (°C)",
-            value=float(config.get('simulation', 'normal_temp_evaporator_max')),
             step=0.5,
-            help="Temperatura operacional normal máxima para evaporador"
+            help="Temperatura operacional normal máxima para evaporador",
+            key="sim_normal_max"
         )
         
         failure_prob = st.slider(
             "Probabilidade de Falha (%)",
             min_value=0.0,
             max_value=20.0,
-            value=config.get('simulation', 'failure_probability') * 100,
             step=0.5,
-            help="Probabilidade de simular um evento de falha por leitura"
+            help="Probabilidade de simular um evento de falha por leitura",
+            key="sim_failure_prob"
         )
         
         failure_duration = st.number_input(
             "Duração da Falha (segundos)",
             min_value=10,
             max_value=600,
-            value=config.get('simulation', 'failure_duration_seconds'),
             step=10,
-            help="Quanto tempo dura uma falha simulada"
+            help="Quanto tempo dura uma falha simulada",
+            key="sim_failure_duration"
         )
         
         temp_variation = st.number_input(
             "Faixa de Variação de Temperatura (±°C)",
             min_value=0.1,
             max_value=2.0,
-            value=float(config.get('simulation', 'temp_variation_range')),
             step=0.1,
-            help="Variação aleatória adicionada às leituras"
+            help="Variação aleatória adicionada às leituras",
+            key="sim_temp_variation"
         )
         
-        if st.button("Salvar Configurações de Simulação", key="save_simulation"):
-            config.set('simulation', 'normal_temp_evaporator_min', sim_min)
-            config.set('simulation', 'normal_temp_evaporator_max', sim_max)
-            config.set('simulation', 'failure_probability', failure_prob / 100)
-            config.set('simulation', 'failure_duration_seconds', failure_duration)
-            config.set('simulation', 'temp_variation_range', temp_variation)
-            st.success("✓ Configurações de simulação salvas com sucesso!")
+        if st.form_submit_button("Salvar Configurações de Simulação", key="save_simulation"):
+            saved = config.set_many([
+                (('simulation', 'normal_temp_evaporator_min'), sim_min),
+                (('simulation', 'normal_temp_evaporator_max'), sim_max),
+                (('simulation', 'failure_probability'), failure_prob / 100),
+                (('simulation', 'failure_duration_seconds'), failure_duration),
+                (('simulation', 'temp_variation_range'), temp_variation)
+            ])
+            _show_save_result(config, saved, "✓ Configurações de simulação salvas com sucesso!")
+
+@st.fragment
+def _render_advanced(config: ConfigManager):
+    """Seção de configurações avançadas e gerenciamento da configuração"""
+    st.subheader("🔧 Configurações Avançadas")
     
-    # Aba 7: Configurações Avançadas
-    with tabs[6]:
-        st.subheader("🔧 Configurações Avançadas")
-        
+    with st.form(key="form_advanced"):
         dashboard_title = st.text_input(
             "Título do Dashboard",
-            value=config.get('ui_settings', 'dashboard_title'),
-            help="Título personalizado para o dashboard"
+            help="Título personalizado para o dashboard",
+            key="ui_dashboard_title"
         )
         
         show_advanced = st.checkbox(
             "Mostrar Métricas Avançadas",
-            value=config.get('ui_settings', 'show_advanced_metrics'),
-            help="Exibir métricas e estatísticas adicionais"
+            help="Exibir métricas e estatísticas adicionais",
+            key="ui_show_advanced"
         )
         
-        if st.button("Salvar Configurações Avançadas", key="save_advanced"):
-            config.set('ui_settings', 'dashboard_title', dashboard_title)
-            config.set('ui_settings', 'show_advanced_metrics', show_advanced)
-            st.success("✓ Configurações avançadas salvas com sucesso!")
-        
-        st.markdown("---")
-        st.markdown("**Gerenciamento de Configuração**")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("Redefinir para Padrões", key="reset_config"):
-                if st.checkbox("Confirmar redefinição para configuração padrão", key="confirm_reset"):
-                    config.reset_to_default()
-                    st.success("✓ Configuração redefinida para padrões!")
-                    st.rerun()
-        
-        with col2:
-            if st.button("Exportar Configuração", key="export_config"):
-                export_path = f"freezer_config_backup_{datetime.now(ZoneInfo("America/Sao_Paulo"))
-.strftime('%Y%m%d_%H%M%S')}.json"
-                if config.export_config(export_path):
-                    st.success(f"✓ Configuração exportada para {export_path}")
-        
-        with col3:
-            st.download_button(
-                "Baixar Arquivo de Config",
-                data=open('freezer_config.json', 'r').read() if os.path.exists('freezer_config.json') else "",
-                file_name=f"freezer_config_{datetime.now(ZoneInfo("America/Sao_Paulo"))
-.strftime('%Y%m%d')}.json",
-                mime="application/json",
-                disabled=not os.path.exists('freezer_config.json')
-            )
+        if st.form_submit_button("Salvar Configurações Avançadas", key="save_advanced"):
+            saved = config.set_many([
+                (('ui_settings', 'dashboard_title'), dashboard_title),
+                (('ui_settings', 'show_advanced_metrics'), show_advanced)
+            ])
+            _show_save_result(config, saved, "✓ Configurações avançadas salvas com sucesso!")
+    
+    st.markdown("---")
+    st.markdown("**Gerenciamento de Configuração**")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        reset_done = st.session_state.pop('config_reset_done', None)
+        if reset_done is not None:
+            _show_save_result(config, reset_done, "✓ Configuração redefinida para padrões!")
+        if st.button("Redefinir para Padrões", key="reset_config"):
+            _confirm_reset_dialog(config)
+    
+    with col2:
+        if st.button("Exportar Configuração", key="export_config"):
+            export_path = f"freezer_config_backup_{datetime.now(LOCAL_TZ).strftime('%Y%m%d_%H%M%S')}.json"
+            if config.export_config(export_path):
+                st.success(f"✓ Configuração exportada para {export_path}")
+    
+    with col3:
+        st.download_button(
+            "Baixar Arquivo de Config",
+            data=_config_file_bytes(config, config.get('system_metadata', 'last_modified')),
+            file_name=f"freezer_config_{datetime.now(LOCAL_TZ).strftime('%Y%m%d')}.json",
+            mime="application/json",
+            disabled=not config.file_exists
+        )
+
+@st.dialog("Confirmar redefinição")
+def _confirm_reset_dialog(config: ConfigManager):
+    """Diálogo de confirmação antes de restaurar a configuração padrão"""
+    st.write("Todas as configurações voltarão aos valores padrão. Deseja continuar?")
+    if st.button("Sim, redefinir", key="confirm_reset", type="primary"):
+        # A nova versão da configuração faz os widgets serem recarregados no próximo rerun
+        st.session_state.config_reset_done = config.reset_to_default()
+        st.rerun()
+
+# Função de renderização de cada seção
+SECTION_RENDERERS = {
+    CONFIG_SECTIONS[0]: _render_freezer_info,
+    CONFIG_SECTIONS[1]: _render_temperature_thresholds,
+    CONFIG_SECTIONS[2]: _render_data_collection,
+    CONFIG_SECTIONS[3]: _render_email_alerts,
+    CONFIG_SECTIONS[4]: _render_data_logging,
+    CONFIG_SECTIONS[5]: _render_simulation,
+    CONFIG_SECTIONS[6]: _render_advanced
+}
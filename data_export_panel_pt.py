@@ -3,12 +3,69 @@ Módulo do Painel de Exportação de Dados
 Fornece UI para exportar e gerenciar dados históricos
 """
 
+import os
 import streamlit as st
 import pandas as pd
-from zoneinfo import ZoneInfo
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 from datetime import datetime
 from data_logger import DataLogger
-from config_manager import ConfigManager
+from config_manager import ConfigManager, LOCAL_TZ
+
+def _log_mtime(logger: DataLogger) -> float:
+    """Horário de modificação do CSV de log (0 se ainda não existir), usado como chave de cache"""
+    # Grava leituras pendentes antes, para que o mtime reflita o log completo
+    logger.flush()
+    try:
+        return os.path.getmtime(logger.csv_file)
+    except OSError:
+        return 0.0
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_statistics(_logger: DataLogger, csv_file: str, mtime: float, hours: int) -> dict:
+    """Estatísticas em cache; uma nova linha no log altera o mtime e invalida a entrada"""
+    return _logger.get_statistics(hours)
+
+@st.cache_data(ttl=60, max_entries=4, show_spinner=False)
+def _cached_historical_data(_logger: DataLogger, csv_file: str, until: pd.Timestamp, hours: int) -> pd.DataFrame:
+    """
+    Dados históricos em cache para uma janela fixa (de until - hours até until)
+    
+    A janela não depende do relógio nem de linhas gravadas depois, então
+    recalcular após expirar o cache devolve a mesma tabela.
+    """
+    return _logger.get_historical_data(hours=hours, until=until)
+
+def _forget_historical_view():
+    """Descartar a visualização carregada (ao mudar as horas ou limpar os dados)"""
+    st.session_state.pop('historical_view', None)
+    st.session_state.pop('historical_filename', None)
+
+def _csv_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serializar um DataFrame em CSV com o writer em C do pyarrow
+    
+    Timestamps saem no horário local com precisão de segundos e booleanos como
+    True/False, como no arquivo de log. Os valores de texto vão entre aspas
+    (quoting_style padrão do Arrow), o que mantém o CSV válido mesmo com
+    vírgulas, aspas ou quebras de linha. Floats inteiros saem sem ".0"
+    (28 em vez de 28.0), o mesmo valor para qualquer leitor de CSV.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    columns = []
+    for column in table.columns:
+        if pa.types.is_timestamp(column.type):
+            column = pc.strftime(column.cast(pa.timestamp('s', tz=column.type.tz)), format='%Y-%m-%d %H:%M:%S')
+        elif pa.types.is_boolean(column.type):
+            column = pc.if_else(column, 'True', 'False')
+        columns.append(column)
+    table = pa.table(columns, names=table.column_names)
+    
+    buffer = pa.BufferOutputStream()
+    buffer.write((','.join(table.column_names) + '\n').encode('utf-8'))
+    pacsv.write_csv(table, buffer, write_options=pacsv.WriteOptions(include_header=False))
+    return buffer.getvalue().to_pybytes()
 
 def show_data_export_panel(logger: DataLogger, config: ConfigManager):
     """Exibir painel de exportação e gerenciamento de dados"""
@@ -30,14 +87,14 @@ def show_data_export_panel(logger: DataLogger, config: ConfigManager):
     
     with col2:
         if st.button("Calcular Estatísticas", key="calc_stats"):
-            stats = logger.get_statistics(hours_range)
+            stats = _cached_statistics(logger, logger.csv_file, _log_mtime(logger), hours_range)
             if stats:
                 st.session_state.current_stats = stats
             else:
                 st.warning("Nenhum dado disponível para o intervalo selecionado")
     
-    if hasattr(st.session_state, 'current_stats') and st.session_state.current_stats:
-        stats = st.session_state.current_stats
+    stats = st.session_state.get('current_stats')
+    if stats:
         st.markdown("---")
         col1, col2, col3 = st.columns(3)
         
@@ -74,28 +131,28 @@ def show_data_export_panel(logger: DataLogger, config: ConfigManager):
         )
     
     with col2:
+        # Nome padrão gerado uma vez por sessão, para não mudar enquanto o usuário digita
+        if 'export_filename' not in st.session_state:
+            st.session_state.export_filename = f"exportacao_temperatura_{datetime.now(LOCAL_TZ).strftime('%Y%m%d_%H%M%S')}.csv"
+        
         export_filename = st.text_input(
             "Nome do Arquivo de Exportação",
-            value=f"exportacao_temperatura_{datetime.now(ZoneInfo("America/Sao_Paulo"))
-.strftime('%Y%m%d_%H%M%S')}.csv",
-            help="Nome para o arquivo CSV exportado"
+            help="Nome para o arquivo CSV exportado",
+            key="export_filename"
         )
     
     if st.button("Exportar para CSV", key="export_csv"):
         export_path = f"exports/{export_filename}"
-        if logger.export_data(export_path, hours=export_hours):
+        # export_data devolve os bytes gravados, então o arquivo não é lido de volta
+        csv_data = logger.export_data(export_path, hours=export_hours)
+        if csv_data:
             st.success(f"✓ Dados exportados com sucesso para {export_path}")
-            try:
-                with open(export_path, 'r') as f:
-                    csv_data = f.read()
-                st.download_button(
-                    label="Baixar Arquivo Exportado",
-                    data=csv_data,
-                    file_name=export_filename,
-                    mime="text/csv"
-                )
-            except Exception as e:
-                st.error(f"Erro ao preparar download: {e}")
+            st.download_button(
+                label="Baixar Arquivo Exportado",
+                data=csv_data,
+                file_name=export_filename,
+                mime="text/csv"
+            )
         else:
             st.error("Falha ao exportar dados")
     
@@ -113,29 +170,41 @@ def show_data_export_panel(logger: DataLogger, config: ConfigManager):
             max_value=72,
             value=6,
             step=1,
-            key="view_hours"
+            key="view_hours",
+            on_change=_forget_historical_view
         )
     
     with col2:
         if st.button("Carregar Dados Históricos", key="load_historical"):
-            df = logger.get_historical_data(hours=view_hours)
+            # A janela é fixada no carregamento, não recalculada pelo relógio a cada rerun
+            until = pd.Timestamp.now(tz=LOCAL_TZ)
+            df = _cached_historical_data(logger, logger.csv_file, until, view_hours)
             if not df.empty:
-                st.session_state.historical_df = df
+                # Só a chave do cache fica na sessão; o DataFrame fica no cache limitado do Streamlit
+                st.session_state.historical_view = (until, view_hours)
+                # Nome do download fixado no carregamento, não recalculado a cada rerun
+                st.session_state.historical_filename = f"dados_historicos_{datetime.now(LOCAL_TZ).strftime('%Y%m%d_%H%M%S')}.csv"
                 st.success(f"Carregados {len(df)} registros")
             else:
                 st.warning("Nenhum dado disponível para o intervalo selecionado")
     
-    if hasattr(st.session_state, 'historical_df') and not st.session_state.historical_df.empty:
-        df = st.session_state.historical_df
-        display_df = df.copy()
-        display_df['timestamp'] = pd.to_datetime(display_df['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        st.dataframe(display_df, use_container_width=True, height=400)
-        csv = display_df.to_csv(index=False)
+    historical_view = st.session_state.get('historical_view')
+    df = _cached_historical_data(logger, logger.csv_file, *historical_view) if historical_view else None
+    if df is not None and not df.empty:
+        # Timestamps seguem como datetime; a formatação fica a cargo do frontend e do writer de CSV
+        st.dataframe(
+            df,
+            column_config={
+                "timestamp": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss")
+            },
+            use_container_width=True,
+            height=400
+        )
+        csv = _csv_bytes(df)
         st.download_button(
             label="Baixar Visualização Atual como CSV",
             data=csv,
-            file_name=f"dados_historicos_{datetime.now(ZoneInfo("America/Sao_Paulo"))
-.strftime('%Y%m%d_%H%M%S')}.csv",
+            file_name=st.session_state.get('historical_filename', "dados_historicos.csv"),
             mime="text/csv"
         )
     
@@ -169,10 +238,8 @@ def show_data_export_panel(logger: DataLogger, config: ConfigManager):
             if confirm_text == "DELETAR TUDO":
                 if logger.clear_all_data():
                     st.success("✓ Todos os dados foram limpos")
-                    if hasattr(st.session_state, 'historical_df'):
-                        del st.session_state.historical_df
-                    if hasattr(st.session_state, 'current_stats'):
-                        del st.session_state.current_stats
+                    _forget_historical_view()
+                    st.session_state.pop('current_stats', None)
                     st.rerun()
                 else:
                     st.error("Falha ao limpar dados")
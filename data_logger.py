@@ -3,14 +3,104 @@ Data Logger Module
 Handles CSV logging and historical data management for temperature readings
 """
 
+import atexit
 import os
 import csv
+import io
+import mmap
+import shutil
+import tempfile
+import threading
+import time
+import weakref
 from zoneinfo import ZoneInfo
 from datetime import datetime, timedelta
 from typing import Dict, List
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from config_manager import ConfigManager
 
+# Timestamp format used in the CSV log
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Columns of the CSV log, in file order
+LOG_COLUMNS = [
+    'timestamp',
+    'evaporator_temp',
+    'condenser_temp',
+    'ambient_temp',
+    'evaporator_status',
+    'condenser_status',
+    'ambient_status',
+    'overall_status',
+    'failure_mode'
+]
+
+# Column types of the parsed log, so the CSV reader never has to infer them
+STATUS_DTYPE = pd.CategoricalDtype(['OK', 'WARNING', 'CRITICAL'])
+STATUS_COLUMNS = ['evaporator_status', 'condenser_status', 'ambient_status', 'overall_status']
+LOG_ARROW_TYPES = {
+    'timestamp': pa.timestamp('us'),
+    'evaporator_temp': pa.float64(),
+    'condenser_temp': pa.float64(),
+    'ambient_temp': pa.float64(),
+    'failure_mode': pa.bool_(),
+    **{column: pa.dictionary(pa.int32(), pa.string()) for column in STATUS_COLUMNS}
+}
+_LOG_CONVERT_OPTIONS = pacsv.ConvertOptions(column_types=LOG_ARROW_TYPES, timestamp_parsers=[TIMESTAMP_FORMAT])
+
+# Buffered readings are written after this delay or once this many are queued
+LOG_FLUSH_SECONDS = 1.0
+LOG_FLUSH_ROWS = 50
+# Most readings kept in memory while the CSV cannot be written; older ones are dropped
+LOG_MAX_BUFFERED_ROWS = 10000
+
+# Loggers with readings not yet written to disk
+_pending_loggers = weakref.WeakSet()
+_pending_lock = threading.Lock()
+_pending_event = threading.Event()
+_writer_thread = None
+
+def _flush_pending_loggers():
+    """
+    Write every buffered reading to disk, queueing failed loggers for a retry
+    """
+    with _pending_lock:
+        loggers = list(_pending_loggers)
+        _pending_loggers.clear()
+    for logger in loggers:
+        if not logger.flush():
+            with _pending_lock:
+                _pending_loggers.add(logger)
+            _pending_event.set()
+
+def _writer_loop():
+    """
+    Background loop that writes buffered readings at most once per flush interval
+    """
+    while True:
+        _pending_event.wait()
+        time.sleep(LOG_FLUSH_SECONDS)
+        _pending_event.clear()
+        _flush_pending_loggers()
+
+def _schedule_write(logger):
+    """
+    Queue a logger for the next background write, starting the writer if needed
+    """
+    global _writer_thread
+    with _pending_lock:
+        _pending_loggers.add(logger)
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_writer_loop, name="log-writer", daemon=True)
+            _writer_thread.start()
+    _pending_event.set()
+
+# Make sure no buffered reading is lost when the process exits
+atexit.register(_flush_pending_loggers)
+
 class DataLogger:
     """Manages logging of temperature data to CSV files"""
     
@@ -23,6 +113,13 @@ class DataLogger:
         """
         self.config = config_manager
         self.csv_file = self.config.get('data_logging', 'csv_file_path')
+        # Rows waiting to be appended to the CSV, guarded by the lock
+        self._buffer = []
+        self._lock = threading.RLock()
+        # Parsed log kept in memory; later reads only parse rows appended since
+        self._log_cache = None
+        self._log_offset = 0
+        self._log_tail = b''
         self._ensure_csv_exists()
     
     def _ensure_csv_exists(self):
@@ -34,26 +131,17 @@ class DataLogger:
         
         # Create file with headers if it doesn't exist
         if not os.path.exists(self.csv_file):
-            headers = [
-                'timestamp',
-                'evaporator_temp',
-                'condenser_temp',
-                'ambient_temp',
-                'evaporator_status',
-                'condenser_status',
-                'ambient_status',
-                'overall_status',
-                'failure_mode'
-            ]
-            
             with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow(headers)
+                writer.writerow(LOG_COLUMNS)
     
     def log_reading(self, reading: Dict, status: Dict) -> bool:
         """
         Log a temperature reading to CSV file
         
+        The row is buffered and appended together with other pending rows by
+        a background writer; reads through this logger flush it first.
+        
         Args:
             reading: Temperature reading dictionary
             status: Status dictionary for all zones
@@ -66,7 +154,8 @@ class DataLogger:
         
         try:
             row = [
-                reading['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+                # Same text as strftime(TIMESTAMP_FORMAT), without interpreting a format string
+                reading['timestamp'].replace(tzinfo=None).isoformat(sep=' ', timespec='seconds'),
                 reading['evaporator_temp'],
                 reading['condenser_temp'],
                 reading['ambient_temp'],
@@ -77,46 +166,171 @@ class DataLogger:
                 reading.get('failure_mode', False)
             ]
             
-            with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
-            
+            with self._lock:
+                self._buffer.append(row)
+                pending = len(self._buffer)
+                if pending > LOG_MAX_BUFFERED_ROWS:
+                    dropped = pending - LOG_MAX_BUFFERED_ROWS
+                    del self._buffer[:dropped]
+                    pending = LOG_MAX_BUFFERED_ROWS
+                    print(f"Warning: CSV log not writable, dropped {dropped} oldest buffered reading(s)")
+            
+            if pending >= LOG_FLUSH_ROWS:
+                return self.flush()
+            _schedule_write(self)
             return True
             
         except Exception as e:
             print(f"Error logging data: {e}")
             return False
     
-    def get_historical_data(self, hours: int = 24) -> pd.DataFrame:
+    def flush(self) -> bool:
+        """
+        Append buffered readings to the CSV file immediately
+        
+        Rows stay buffered until the append succeeds, so a failed write is
+        retried on the next flush instead of losing them.
+        
+        Returns:
+            True if successful (or nothing was pending), False otherwise
+        """
+        with self._lock:
+            if not self._buffer:
+                return True
+            try:
+                # Format every row first and append them in a single write
+                chunk = io.StringIO(newline='')
+                csv.writer(chunk).writerows(self._buffer)
+                with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
+                    f.write(chunk.getvalue())
+                self._buffer = []
+                return True
+            except Exception as e:
+                print(f"Error logging data: {e}")
+                return False
+    
+    def _parse_log_bytes(self, data: bytes, has_header: bool) -> pd.DataFrame:
+        """
+        Parse complete CSV log lines into a DataFrame with localized timestamps
+        
+        Args:
+            data: Raw CSV bytes (or a buffer over them) ending at a line boundary
+            has_header: Whether the first line is the column header
+            
+        Returns:
+            DataFrame with the parsed rows
+        """
+        table = pacsv.read_csv(
+            pa.BufferReader(data),
+            read_options=pacsv.ReadOptions(column_names=None if has_header else LOG_COLUMNS),
+            convert_options=_LOG_CONVERT_OPTIONS
+        )
+        df = table.to_pandas()
+        
+        # Arrow dictionaries only hold the values present in this chunk; use the fixed
+        # categories so that appended chunks concatenate without falling back to object
+        for column in STATUS_COLUMNS:
+            df[column] = df[column].astype(STATUS_DTYPE)
+        
+        if not df.empty:
+            df["timestamp"] = df["timestamp"].dt.tz_localize("America/Sao_Paulo", nonexistent="shift_forward", ambiguous="NaT")
+        return df
+    
+    def _read_log(self) -> pd.DataFrame:
+        """
+        Read the CSV log with timestamps parsed as timezone-aware datetimes
+        
+        The parsed log is cached in memory. When the file has only grown since
+        the last read, just the appended lines are parsed; if it was rewritten
+        (cleanup, clear) it is parsed again from the start.
+        
+        Returns:
+            DataFrame with every logged reading (empty if the file is missing or has no rows).
+            The frame is shared with the cache and must not be modified in place.
+        """
+        self.flush()
+        
+        if not os.path.exists(self.csv_file):
+            self._log_cache = None
+            return pd.DataFrame()
+        
+        with open(self.csv_file, 'rb') as f:
+            if self._log_cache is not None and self._log_offset > 0:
+                # The file is unchanged up to our offset if the last parsed line is still there
+                f.seek(max(self._log_offset - len(self._log_tail), 0))
+                if f.read(len(self._log_tail)) == self._log_tail:
+                    data = f.read()
+                    end = data.rfind(b'\n') + 1
+                    if end == 0:
+                        return self._log_cache
+                    
+                    rows = self._parse_log_bytes(data[:end], has_header=False)
+                    if self._log_cache.empty:
+                        self._log_cache = rows
+                    else:
+                        self._log_cache = pd.concat([self._log_cache, rows], ignore_index=True)
+                    self._log_offset += end
+                    self._log_tail = data[data.rfind(b'\n', 0, end - 1) + 1:end]
+                    return self._log_cache
+            
+            # Full parse (first read, or the file was rewritten)
+            self._log_offset = 0
+            self._log_tail = b''
+            if os.fstat(f.fileno()).st_size == 0:
+                # Truncated externally; mmap cannot map an empty file
+                self._log_cache = pd.DataFrame()
+                return self._log_cache
+            
+            # The file is mapped and handed to the parser as-is instead of being
+            # copied into a bytes object. Not a with-block: if the parse raises, the
+            # traceback still references the exported buffer and closing the map
+            # would replace the real error with a BufferError.
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            end = mm.rfind(b'\n') + 1
+            if end == 0:
+                # Only a partial first line (no complete header yet)
+                mm.close()
+                self._log_cache = pd.DataFrame()
+                return self._log_cache
+            buffer = pa.py_buffer(mm)
+            self._log_cache = self._parse_log_bytes(buffer.slice(0, end), has_header=True)
+            del buffer
+            self._log_offset = end
+            self._log_tail = mm[mm.rfind(b'\n', 0, end - 1) + 1:end]
+            mm.close()
+        return self._log_cache
+    
+    def get_historical_data(self, hours: int = 24, until: pd.Timestamp = None) -> pd.DataFrame:
         """
         Get historical data from CSV file
         
         Args:
             hours: Number of hours of historical data to retrieve
+            until: End of the window (inclusive); defaults to now, in which case
+                   rows logged later are not part of a fixed window
             
         Returns:
             DataFrame with historical data
         """
         try:
-            if not os.path.exists(self.csv_file):
-                return pd.DataFrame()
-            
-            df = pd.read_csv(self.csv_file)
+            df = self._read_log()
             
             if df.empty:
                 return df
             
-            # Convert timestamp to datetime
-            df["timestamp"] = pd.to_datetime(df["timestamp"]).dt.tz_localize("America/Sao_Paulo", nonexistent="shift_forward", ambiguous="NaT")
+            # Sort by timestamp; the log is appended in order, so this is normally skipped
+            if not df['timestamp'].is_monotonic_increasing:
+                df = df.dropna(subset=['timestamp']).sort_values('timestamp')
             
-            # Filter by time range
-            cutoff_time = pd.Timestamp.now(tz="America/Sao_Paulo") - pd.Timedelta(hours=2)
-            df = df[df['timestamp'] >= cutoff_time]
+            # Filter by time range with a binary search on the sorted timestamps
+            if until is None:
+                cutoff_time = pd.Timestamp.now(tz="America/Sao_Paulo") - pd.Timedelta(hours=hours)
+                return df.iloc[df['timestamp'].searchsorted(cutoff_time):]
             
-            # Sort by timestamp
-            df = df.sort_values('timestamp')
-            
-            return df
+            cutoff_time = until - pd.Timedelta(hours=hours)
+            start = df['timestamp'].searchsorted(cutoff_time)
+            end = df['timestamp'].searchsorted(until, side='right')
+            return df.iloc[start:end]
             
         except Exception as e:
             print(f"Error reading historical data: {e}")
@@ -133,17 +347,11 @@ class DataLogger:
             DataFrame with recent readings
         """
         try:
-            if not os.path.exists(self.csv_file):
-                return pd.DataFrame()
-            
-            df = pd.read_csv(self.csv_file)
+            df = self._read_log()
             
             if df.empty:
                 return df
             
-            # Convert timestamp to datetime
-            df["timestamp"] = pd.to_datetime(df["timestamp"]).dt.tz_localize("America/Sao_Paulo", nonexistent="shift_forward", ambiguous="NaT")
-            
             # Get last N rows
             df = df.tail(count)
             
@@ -171,29 +379,28 @@ class DataLogger:
         if df.empty:
             return {}
         
+        # One (rows x zones) float array; each aggregate is a single pass over it
+        temps = df[['evaporator_temp', 'condenser_temp', 'ambient_temp']].to_numpy(dtype=np.float64)
+        mins = temps.min(axis=0)
+        maxs = temps.max(axis=0)
+        means = temps.mean(axis=0)
+        # Sample standard deviation, as pandas computes it (NaN for a single reading)
+        stds = temps.std(axis=0, ddof=1) if len(temps) > 1 else np.full(3, np.nan)
+        
+        overall_status = df['overall_status'].to_numpy()
+        
         stats = {
-            'evaporator': {
-                'min': df['evaporator_temp'].min(),
-                'max': df['evaporator_temp'].max(),
-                'mean': df['evaporator_temp'].mean(),
-                'std': df['evaporator_temp'].std()
-            },
-            'condenser': {
-                'min': df['condenser_temp'].min(),
-                'max': df['condenser_temp'].max(),
-                'mean': df['condenser_temp'].mean(),
-                'std': df['condenser_temp'].std()
-            },
-            'ambient': {
-                'min': df['ambient_temp'].min(),
-                'max': df['ambient_temp'].max(),
-                'mean': df['ambient_temp'].mean(),
-                'std': df['ambient_temp'].std()
-            },
-            'total_readings': len(df),
-            'critical_events': len(df[df['overall_status'] == 'CRITICAL']),
-            'warning_events': len(df[df['overall_status'] == 'WARNING'])
+            zone: {
+                'min': mins[i],
+                'max': maxs[i],
+                'mean': means[i],
+                'std': stds[i]
+            }
+            for i, zone in enumerate(('evaporator', 'condenser', 'ambient'))
         }
+        stats['total_readings'] = len(df)
+        stats['critical_events'] = int(np.count_nonzero(overall_status == 'CRITICAL'))
+        stats['warning_events'] = int(np.count_nonzero(overall_status == 'WARNING'))
         
         return stats
     
@@ -207,27 +414,35 @@ class DataLogger:
         try:
             retention_days = self.config.get('data_logging', 'retention_days')
             
-            if not os.path.exists(self.csv_file):
-                return 0
-            
-            df = pd.read_csv(self.csv_file)
-            
-            if df.empty:
-                return 0
-            
-            original_count = len(df)
-            
-            # Convert timestamp to datetime
-            df["timestamp"] = pd.to_datetime(df["timestamp"]).dt.tz_localize("America/Sao_Paulo", nonexistent="shift_forward", ambiguous="NaT")
-            
-            # Filter data within retention period
+            # Timestamps are written in a fixed-width, most-significant-first format,
+            # so comparing the raw line prefix is the same as comparing the times
             cutoff_date = pd.Timestamp.now(tz="America/Sao_Paulo") - pd.Timedelta(days=retention_days)
-            df = df[df['timestamp'] >= cutoff_date]
-            
-            # Save cleaned data
-            df.to_csv(self.csv_file, index=False)
-            
-            records_removed = original_count - len(df)
+            cutoff = cutoff_date.strftime(TIMESTAMP_FORMAT).encode('utf-8')
+            
+            with self._lock:
+                self.flush()
+                
+                if not os.path.exists(self.csv_file):
+                    return 0
+                
+                # Stream the kept lines into a temporary file next to the log, then swap it in
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.csv_file) or '.', prefix='.log', suffix='.tmp')
+                records_removed = 0
+                try:
+                    with open(self.csv_file, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                        dst.write(src.readline())
+                        for line in src:
+                            if line[:len(cutoff)] >= cutoff:
+                                dst.write(line)
+                            else:
+                                records_removed += 1
+                    
+                    if records_removed > 0:
+                        shutil.copymode(self.csv_file, tmp_path)
+                        os.replace(tmp_path, self.csv_file)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
             
             if records_removed > 0:
                 print(f"Cleaned up {records_removed} old records from log file")
@@ -238,7 +453,7 @@ class DataLogger:
             print(f"Error cleaning up old data: {e}")
             return 0
     
-    def export_data(self, export_path: str, hours: int = 24) -> bool:
+    def export_data(self, export_path: str, hours: int = 24) -> bytes:
         """
         Export historical data to a new CSV file
         
@@ -247,29 +462,31 @@ class DataLogger:
             hours: Number of hours of data to export
             
         Returns:
-            True if exported successfully, False otherwise
+            The CSV bytes written to the file (empty if nothing was exported)
         """
         try:
             df = self.get_historical_data(hours)
             
             if df.empty:
                 print("No data to export")
-                return False
+                return b""
             
             # Ensure export directory exists
             export_dir = os.path.dirname(export_path)
             if export_dir and not os.path.exists(export_dir):
                 os.makedirs(export_dir, exist_ok=True)
             
-            # Export to CSV
-            df.to_csv(export_path, index=False)
+            # Serialize once; the same bytes go to disk and back to the caller
+            csv_data = df.to_csv(index=False).encode('utf-8')
+            with open(export_path, 'wb') as f:
+                f.write(csv_data)
             
             print(f"Exported {len(df)} records to {export_path}")
-            return True
+            return csv_data
             
         except Exception as e:
             print(f"Error exporting data: {e}")
-            return False
+            return b""
     
     def clear_all_data(self) -> bool:
         """
@@ -279,22 +496,12 @@ class DataLogger:
             True if cleared successfully, False otherwise
         """
         try:
-            # Recreate CSV with just headers
-            headers = [
-                'timestamp',
-                'evaporator_temp',
-                'condenser_temp',
-                'ambient_temp',
-                'evaporator_status',
-                'condenser_status',
-                'ambient_status',
-                'overall_status',
-                'failure_mode'
-            ]
-            
-            with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
+            # Recreate CSV with just headers, dropping readings not yet written
+            with self._lock:
+                self._buffer = []
+                with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(LOG_COLUMNS)
             
             print("All logged data cleared")
             return True
@@ -321,14 +528,11 @@ class DataLogger:
         # Filter for non-OK statuses
         alerts = df[df['overall_status'].isin(['CRITICAL', 'WARNING'])]
         
-        alert_list = []
-        for _, row in alerts.iterrows():
-            alert_list.append({
-                'timestamp': row['timestamp'],
-                'status': row['overall_status'],
-                'evaporator_temp': row['evaporator_temp'],
-                'condenser_temp': row['condenser_temp'],
-                'ambient_temp': row['ambient_temp']
-            })
-        
-        return alert_list
+        # Build the records column-wise instead of boxing each row with iterrows
+        return alerts[[
+            'timestamp',
+            'overall_status',
+            'evaporator_temp',
+            'condenser_temp',
+            'ambient_temp'
+        ]].rename(columns={'overall_status': 'status'}).to_dict('records')
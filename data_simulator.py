@@ -6,10 +6,9 @@ Mimics Arduino serial output behavior in pure Python
 
 import random
 import time
-from zoneinfo import ZoneInfo
 from datetime import datetime
 from typing import Dict, Tuple
-from config_manager import ConfigManager
+from config_manager import ConfigManager, LOCAL_TZ
 
 class TemperatureSimulator:
     """Simulates realistic temperature sensor readings for freezer zones"""
@@ -29,6 +28,29 @@ class TemperatureSimulator:
             'condenser': 30.0,
             'ambient': 24.0
         }
+        # Simulation settings copied from the config; refreshed when it changes
+        self._settings_version = None
+        self.reload_config()
+    
+    def reload_config(self):
+        """Copy the simulation settings out of the configuration manager"""
+        self._variation_range = self.config.get('simulation', 'temp_variation_range')
+        self._failure_prob = self.config.get('simulation', 'failure_probability')
+        self._failure_duration = self.config.get('simulation', 'failure_duration_seconds')
+        self._evap_normal_range = (
+            self.config.get('simulation', 'normal_temp_evaporator_min'),
+            self.config.get('simulation', 'normal_temp_evaporator_max')
+        )
+        self._evap_critical_high = self.config.get('temperature_thresholds', 'evaporator', 'critical_high')
+        self._cond_range = (
+            self.config.get('temperature_thresholds', 'condenser', 'min'),
+            self.config.get('temperature_thresholds', 'condenser', 'max')
+        )
+        self._amb_range = (
+            self.config.get('temperature_thresholds', 'ambient', 'min'),
+            self.config.get('temperature_thresholds', 'ambient', 'max')
+        )
+        self._settings_version = self.config.version
     
     def _add_variation(self, base_temp: float, variation_range: float) -> float:
         """
@@ -50,8 +72,7 @@ class TemperatureSimulator:
         Returns:
             True if failure should start, False otherwise
         """
-        failure_prob = self.config.get('simulation', 'failure_probability')
-        return random.random() < failure_prob
+        return random.random() < self._failure_prob
     
     def _check_failure_end(self) -> bool:
         """
@@ -63,9 +84,8 @@ class TemperatureSimulator:
         if self.failure_start_time is None:
             return False
         
-        failure_duration = self.config.get('simulation', 'failure_duration_seconds')
         elapsed = time.time() - self.failure_start_time
-        return elapsed >= failure_duration
+        return elapsed >= self._failure_duration
     
     def _generate_evaporator_temp(self) -> float:
         """
@@ -74,21 +94,19 @@ class TemperatureSimulator:
         Returns:
             Temperature in Celsius
         """
-        variation_range = self.config.get('simulation', 'temp_variation_range')
+        variation_range = self._variation_range
         
         if self.failure_mode:
             # During failure, temperature rises above critical threshold
-            critical_high = self.config.get('temperature_thresholds', 'evaporator', 'critical_high')
             # Temperature rises gradually during failure
-            target_temp = critical_high + random.uniform(0, 5.0)
+            target_temp = self._evap_critical_high + random.uniform(0, 5.0)
             # Smooth transition
             current_temp = self.last_temperatures['evaporator']
             new_temp = current_temp + (target_temp - current_temp) * 0.3
             return self._add_variation(new_temp, variation_range * 0.5)
         else:
             # Normal operation
-            min_temp = self.config.get('simulation', 'normal_temp_evaporator_min')
-            max_temp = self.config.get('simulation', 'normal_temp_evaporator_max')
+            min_temp, max_temp = self._evap_normal_range
             target_temp = random.uniform(min_temp, max_temp)
             # Smooth transition
             current_temp = self.last_temperatures['evaporator']
@@ -102,9 +120,8 @@ class TemperatureSimulator:
         Returns:
             Temperature in Celsius
         """
-        variation_range = self.config.get('simulation', 'temp_variation_range')
-        min_temp = self.config.get('temperature_thresholds', 'condenser', 'min')
-        max_temp = self.config.get('temperature_thresholds', 'condenser', 'max')
+        variation_range = self._variation_range
+        min_temp, max_temp = self._cond_range
         
         # Condenser temperature varies normally
         target_temp = random.uniform(min_temp, max_temp)
@@ -119,9 +136,8 @@ class TemperatureSimulator:
         Returns:
             Temperature in Celsius
         """
-        variation_range = self.config.get('simulation', 'temp_variation_range')
-        min_temp = self.config.get('temperature_thresholds', 'ambient', 'min')
-        max_temp = self.config.get('temperature_thresholds', 'ambient', 'max')
+        variation_range = self._variation_range
+        min_temp, max_temp = self._amb_range
         
         # Ambient temperature varies slowly
         target_temp = random.uniform(min_temp, max_temp)
@@ -136,6 +152,10 @@ class TemperatureSimulator:
         Returns:
             Dictionary containing temperature readings and metadata
         """
+        # Pick up configuration changes saved since the last reading
+        if self._settings_version != self.config.version:
+            self.reload_config()
+        
         # Check failure state transitions
         if not self.failure_mode and self._check_failure_trigger():
             self.failure_mode = True
@@ -158,7 +178,7 @@ class TemperatureSimulator:
         
         # Create reading data structure
         reading = {
-            'timestamp': datetime.now(ZoneInfo("America/Sao_Paulo")),
+            'timestamp': datetime.now(LOCAL_TZ),
             'evaporator_temp': round(evaporator_temp, 2),
             'condenser_temp': round(condenser_temp, 2),
             'ambient_temp': round(ambient_temp, 2),
@@ -179,35 +199,16 @@ class TemperatureSimulator:
         """
         status = {}
         
-        # Check evaporator
-        evap_temp = reading['evaporator_temp']
-        evap_thresholds = self.config.get('temperature_thresholds', 'evaporator')
-        if evap_temp > evap_thresholds['critical_high'] or evap_temp < evap_thresholds['critical_low']:
-            status['evaporator'] = 'CRITICAL'
-        elif evap_temp > evap_thresholds['max'] or evap_temp < evap_thresholds['min']:
-            status['evaporator'] = 'WARNING'
-        else:
-            status['evaporator'] = 'OK'
-        
-        # Check condenser
-        cond_temp = reading['condenser_temp']
-        cond_thresholds = self.config.get('temperature_thresholds', 'condenser')
-        if cond_temp > cond_thresholds['critical_high'] or cond_temp < cond_thresholds['critical_low']:
-            status['condenser'] = 'CRITICAL'
-        elif cond_temp > cond_thresholds['max'] or cond_temp < cond_thresholds['min']:
-            status['condenser'] = 'WARNING'
-        else:
-            status['condenser'] = 'OK'
-        
-        # Check ambient
-        amb_temp = reading['ambient_temp']
-        amb_thresholds = self.config.get('temperature_thresholds', 'ambient')
-        if amb_temp > amb_thresholds['critical_high'] or amb_temp < amb_thresholds['critical_low']:
-            status['ambient'] = 'CRITICAL'
-        elif amb_temp > amb_thresholds['max'] or amb_temp < amb_thresholds['min']:
-            status['ambient'] = 'WARNING'
-        else:
-            status['ambient'] = 'OK'
+        # Classify each zone against its precomputed thresholds
+        for zone in ('evaporator', 'condenser', 'ambient'):
+            temp = reading[f'{zone}_temp']
+            limits = self.config.thresholds[zone]
+            if temp > limits.critical_high or temp < limits.critical_low:
+                status[zone] = 'CRITICAL'
+            elif temp > limits.normal_max or temp < limits.normal_min:
+                status[zone] = 'WARNING'
+            else:
+                status[zone] = 'OK'
         
         # Overall status (worst case)
         all_statuses = list(status.values())
@@ -230,7 +231,7 @@ class TemperatureSimulator:
         Returns:
             Formatted string mimicking Arduino serial output
         """
-        output = f"[{reading['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}] "
+        output = f"[{reading['timestamp'].replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')}] "
         output += f"Evaporator: {reading['evaporator_temp']:.2f}°C | "
         output += f"Condenser: {reading['condenser_temp']:.2f}°C | "
         output += f"Ambient: {reading['ambient_temp']:.2f}°C"
@@ -4,16 +4,21 @@ Handles automated email alerts for critical temperature events
 """
 
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from zoneinfo import ZoneInfo
-from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 from config_manager import ConfigManager
 
+# Temperature zones checked for alerts
+_ZONES = ('evaporator', 'condenser', 'ambient')
+
 class EmailNotifier:
     """Manages email notifications for temperature alerts"""
     
+    # Zone names used in the alert email
+    ZONE_NAMES = {'evaporator': 'Evaporador', 'condenser': 'Condensador', 'ambient': 'Ambiente'}
+    
     def __init__(self, config_manager: ConfigManager):
         """
         Initialize the email notifier
@@ -22,8 +27,22 @@ class EmailNotifier:
             config_manager: Configuration manager instance
         """
         self.config = config_manager
+        # time.monotonic() of the last alert sent per alert key
         self.last_alert_time = {}
         self.consecutive_critical_count = {}
+        # Config sections used per alert, re-read only when the configuration changes
+        self._settings_version = None
+        self._refresh_settings()
+    
+    def _refresh_settings(self):
+        """Re-bind the configuration sections used by the notifier if they changed"""
+        if self._settings_version == self.config.version:
+            return
+        self._email_cfg = self.config.get('email_config')
+        self._alert_cfg = self.config.get('alert_settings')
+        self._freezer_cfg = self.config.get('freezer_info')
+        self._build_email_templates()
+        self._settings_version = self.config.version
     
     def _get_smtp_password(self) -> str:
         """
@@ -35,16 +54,60 @@ class EmailNotifier:
         import os
         return os.environ.get('SMTP_PASSWORD', '')
     
+    def _connect(self) -> smtplib.SMTP:
+        """
+        Open and authenticate a new SMTP connection
+        
+        Returns:
+            Logged-in SMTP connection
+        """
+        email_cfg = self._email_cfg
+        server = smtplib.SMTP(email_cfg['smtp_server'], email_cfg['smtp_port'], timeout=10)
+        
+        if email_cfg['use_tls']:
+            server.starttls()
+        
+        server.login(email_cfg['sender_email'], self._get_smtp_password())
+        return server
+    
+    def _send_message(self, msg: MIMEMultipart, from_addr: str, to_addrs: List[str]):
+        """
+        Send a message over a new SMTP connection, closed right after
+        
+        Alerts are at least alert_cooldown_seconds apart, longer than providers
+        keep an idle connection open, so no connection is kept between sends.
+        The envelope addresses are passed explicitly, so smtplib does not have
+        to parse them back out of the From/To headers.
+        
+        Args:
+            msg: Email message to send
+            from_addr: Envelope sender address
+            to_addrs: Envelope recipient addresses
+        """
+        server = self._connect()
+        try:
+            server.send_message(msg, from_addr=from_addr, to_addrs=to_addrs)
+        finally:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+    
     def _is_configured(self) -> bool:
         """
         Check if email configuration is complete
         
+        Safe to call from outside the alert path (the system info panel uses it);
+        the bound configuration is refreshed first if it changed.
+        
         Returns:
             True if configured, False otherwise
         """
-        sender_email = self.config.get('email_config', 'sender_email')
+        self._refresh_settings()
+        
+        sender_email = self._email_cfg['sender_email']
         sender_password = self._get_smtp_password()
-        recipients = self.config.get('email_config', 'recipient_emails')
+        recipients = self._email_cfg['recipient_emails']
         
         return (sender_email and sender_password and recipients and len(recipients) > 0)
     
@@ -58,108 +121,63 @@ class EmailNotifier:
         Returns:
             True if alert can be sent, False if in cooldown period
         """
-        if not self.config.get('alert_settings', 'enable_email_alerts'):
+        if not self._alert_cfg['enable_email_alerts']:
             return False
         
-        cooldown_seconds = self.config.get('alert_settings', 'alert_cooldown_seconds')
+        cooldown_seconds = self._alert_cfg['alert_cooldown_seconds']
         
         if alert_key not in self.last_alert_time:
             return True
         
-        time_since_last = datetime.now(ZoneInfo("America/Sao_Paulo")) - self.last_alert_time[alert_key]
-        return time_since_last.total_seconds() >= cooldown_seconds
+        return time.monotonic() - self.last_alert_time[alert_key] >= cooldown_seconds
     
-    def _update_consecutive_count(self, zone: str, is_critical: bool):
+    def _build_email_templates(self):
         """
-        Update consecutive critical reading count for a zone
+        Pre-render the parts of the alert email that only depend on the configuration
         
-        Args:
-            zone: Temperature zone name
-            is_critical: Whether current reading is critical
+        The styles, header, footer, freezer information and per-zone limits are
+        formatted once per configuration change; each alert only formats the
+        readings in between.
         """
-        if is_critical:
-            self.consecutive_critical_count[zone] = self.consecutive_critical_count.get(zone, 0) + 1
-        else:
-            self.consecutive_critical_count[zone] = 0
-    
-    def _should_trigger_alert(self, zone: str) -> bool:
-        """
-        Check if alert should be triggered based on consecutive readings
-        
-        Args:
-            zone: Temperature zone name
-            
-        Returns:
-            True if alert should be triggered
-        """
-        required_count = self.config.get('alert_settings', 'consecutive_readings_trigger')
-        current_count = self.consecutive_critical_count.get(zone, 0)
-        return current_count >= required_count
-    
-    def _create_alert_email(self, reading: Dict, status: Dict) -> MIMEMultipart:
-        """
-        Create email message for temperature alert
-        
-        Args:
-            reading: Temperature reading data
-            status: Status information for all zones
-            
-        Returns:
-            Email message object
-        """
-        msg = MIMEMultipart('alternative')
+        freezer_info = self._freezer_cfg
+        zone_names = self.ZONE_NAMES
         
-        # Email subject
-        freezer_model = self.config.get('freezer_info', 'model_name')
-        msg['Subject'] = f"🚨 ALERTA CRÍTICO: {freezer_model} - Limite de Temperatura Excedido"
-        msg['From'] = self.config.get('email_config', 'sender_email')
-        msg['To'] = ', '.join(self.config.get('email_config', 'recipient_emails'))
-        
-        # Create email body
-        critical_zones = [zone for zone, stat in status.items() if stat == 'CRITICAL' and zone != 'overall']
+        # Temperature limits of each zone, joined per alert for the critical zones
+        self._zone_limits_text = {}
+        self._zone_limits_html = {}
+        for zone in _ZONES:
+            limits = self.config.thresholds[zone]
+            name = zone_names.get(zone, zone.capitalize())
+            self._zone_limits_text[zone] = (
+                f"\n{name}:\n"
+                f"  - Faixa Normal: {limits.normal_min:.1f}°C a {limits.normal_max:.1f}°C\n"
+                f"  - Limites Críticos: {limits.critical_low:.1f}°C a {limits.critical_high:.1f}°C\n"
+            )
+            self._zone_limits_html[zone] = f"""
+                <p><strong>{name}:</strong><br>
+                Faixa Normal: {limits.normal_min:.1f}°C a {limits.normal_max:.1f}°C<br>
+                Limites Críticos: {limits.critical_low:.1f}°C a {limits.critical_high:.1f}°C</p>
+"""
         
-        # Plain text version
-        text_body = f"""
+        self._text_head = f"""
 ALERTA DE TEMPERATURA CRÍTICA
 {'=' * 50}
 
 Informações do Freezer:
-- Modelo: {self.config.get('freezer_info', 'model_name')}
-- Localização: {self.config.get('freezer_info', 'location')}
-- Horário: {reading['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}
-
-ZONAS CRÍTICAS: {', '.join(critical_zones).upper()}
-
-Leituras Atuais:
-- Evaporador: {reading['evaporator_temp']:.2f}°C [{status['evaporator']}]
-- Condensador: {reading['condenser_temp']:.2f}°C [{status['condenser']}]
-- Ambiente: {reading['ambient_temp']:.2f}°C [{status['ambient']}]
-
-Limites de Temperatura:
+- Modelo: {freezer_info['model_name']}
+- Localização: {freezer_info['location']}
 """
-        
-        # Add threshold information for critical zones
-        zone_names = {'evaporator': 'Evaporador', 'condenser': 'Condensador', 'ambient': 'Ambiente'}
-        for zone in critical_zones:
-            thresholds = self.config.get('temperature_thresholds', zone)
-            text_body += f"\n{zone_names.get(zone, zone.capitalize())}:\n"
-            text_body += f"  - Faixa Normal: {thresholds['min']:.1f}°C a {thresholds['max']:.1f}°C\n"
-            text_body += f"  - Limites Críticos: {thresholds['critical_low']:.1f}°C a {thresholds['critical_high']:.1f}°C\n"
-        
-        text_body += f"""
+        self._text_tail = f"""
 {'=' * 50}
 
 AÇÃO IMEDIATA NECESSÁRIA!
 
-Contato: {self.config.get('freezer_info', 'operator_name')}
-E-mail: {self.config.get('freezer_info', 'operator_contact')}
+Contato: {freezer_info['operator_name']}
+E-mail: {freezer_info['operator_contact']}
 
 Este é um alerta automático do Sistema de Monitoramento de Freezer FAST BOMBAS.
 """
-        
-        # HTML version
-        zone_names = {'evaporator': 'Evaporador', 'condenser': 'Condensador', 'ambient': 'Ambiente'}
-        html_body = f"""
+        self._html_head = f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -191,9 +209,68 @@ Este é um alerta automático do Sistema de Monitoramento de Freezer FAST BOMBAS
             <div class="section">
                 <div class="section-title">Informações do Freezer</div>
                 <table>
-                    <tr><td class="label">Modelo:</td><td>{self.config.get('freezer_info', 'model_name')}</td></tr>
-                    <tr><td class="label">Localização:</td><td>{self.config.get('freezer_info', 'location')}</td></tr>
-                    <tr><td class="label">Horário do Alerta:</td><td>{reading['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}</td></tr>
+                    <tr><td class="label">Modelo:</td><td>{freezer_info['model_name']}</td></tr>
+                    <tr><td class="label">Localização:</td><td>{freezer_info['location']}</td></tr>
+"""
+        self._html_tail = f"""
+            </div>
+            
+            <div class="section" style="background-color: #fff3cd; padding: 15px; border: 1px solid #ffc107;">
+                <strong>⚠️ AÇÃO IMEDIATA NECESSÁRIA!</strong><br>
+                Contato: {freezer_info['operator_name']}<br>
+                E-mail: {freezer_info['operator_contact']}
+            </div>
+        </div>
+        
+        <div class="footer">
+            <p>Este é um alerta automático do Sistema de Monitoramento de Freezer FAST BOMBAS</p>
+            <p style="font-size: 12px; margin-top: 10px;">Não responda a este e-mail</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+    
+    def _create_alert_email(self, reading: Dict, status: Dict, critical_zones: List[str]) -> MIMEMultipart:
+        """
+        Create email message for temperature alert
+        
+        Args:
+            reading: Temperature reading data
+            status: Status information for all zones
+            critical_zones: Zones that reached the consecutive critical trigger
+            
+        Returns:
+            Email message object
+        """
+        msg = MIMEMultipart('alternative')
+        
+        # Email subject
+        msg['Subject'] = f"🚨 ALERTA CRÍTICO: {self._freezer_cfg['model_name']} - Limite de Temperatura Excedido"
+        msg['From'] = self._email_cfg['sender_email']
+        msg['To'] = ', '.join(self._email_cfg['recipient_emails'])
+        
+        # Create email body
+        zone_names = self.ZONE_NAMES
+        
+        # Plain text version: pre-rendered head and tail around the current readings
+        text_parts = [self._text_head, f"""- Horário: {reading['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}
+
+ZONAS CRÍTICAS: {', '.join(critical_zones).upper()}
+
+Leituras Atuais:
+- Evaporador: {reading['evaporator_temp']:.2f}°C [{status['evaporator']}]
+- Condensador: {reading['condenser_temp']:.2f}°C [{status['condenser']}]
+- Ambiente: {reading['ambient_temp']:.2f}°C [{status['ambient']}]
+
+Limites de Temperatura:
+"""]
+        text_parts.extend(self._zone_limits_text[zone] for zone in critical_zones)
+        text_parts.append(self._text_tail)
+        text_body = ''.join(text_parts)
+        
+        # HTML version, built the same way
+        html_parts = [self._html_head, f"""                    <tr><td class="label">Horário do Alerta:</td><td>{reading['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}</td></tr>
                     <tr><td class="label">Zonas Críticas:</td><td style="color: #dc3545; font-weight: bold;">{', '.join([zone_names.get(z, z.upper()) for z in critical_zones])}</td></tr>
                 </table>
             </div>
@@ -216,34 +293,10 @@ Este é um alerta automático do Sistema de Monitoramento de Freezer FAST BOMBAS
             
             <div class="section">
                 <div class="section-title">Limites de Temperatura</div>
-"""
-        
-        for zone in critical_zones:
-            thresholds = self.config.get('temperature_thresholds', zone)
-            html_body += f"""
-                <p><strong>{zone_names.get(zone, zone.capitalize())}:</strong><br>
-                Faixa Normal: {thresholds['min']:.1f}°C a {thresholds['max']:.1f}°C<br>
-                Limites Críticos: {thresholds['critical_low']:.1f}°C a {thresholds['critical_high']:.1f}°C</p>
-"""
-        
-        html_body += f"""
-            </div>
-            
-            <div class="section" style="background-color: #fff3cd; padding: 15px; border: 1px solid #ffc107;">
-                <strong>⚠️ AÇÃO IMEDIATA NECESSÁRIA!</strong><br>
-                Contato: {self.config.get('freezer_info', 'operator_name')}<br>
-                E-mail: {self.config.get('freezer_info', 'operator_contact')}
-            </div>
-        </div>
-        
-        <div class="footer">
-            <p>Este é um alerta automático do Sistema de Monitoramento de Freezer FAST BOMBAS</p>
-            <p style="font-size: 12px; margin-top: 10px;">Não responda a este e-mail</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
+"""]
+        html_parts.extend(self._zone_limits_html[zone] for zone in critical_zones)
+        html_parts.append(self._html_tail)
+        html_body = ''.join(html_parts)
         
         # Attach both versions
         part1 = MIMEText(text_body, 'plain')
@@ -253,69 +306,77 @@ Este é um alerta automático do Sistema de Monitoramento de Freezer FAST BOMBAS
         
         return msg
     
-    def send_alert(self, reading: Dict, status: Dict) -> bool:
+    def prepare_alert(self, reading: Dict, status: Dict) -> Optional[MIMEMultipart]:
         """
-        Send email alert for critical temperature condition
+        Update the consecutive critical counts and build the alert due for a reading
+        
+        The cooldown is claimed as soon as a message is returned, so readings
+        taken while it is being sent do not queue further alerts.
         
         Args:
             reading: Temperature reading data
             status: Status information for all zones
             
         Returns:
-            True if email sent successfully, False otherwise
+            Alert email to send, or None if no alert is due
         """
         # Check if email is configured
         if not self._is_configured():
             print("Email not configured. Skipping alert.")
-            return False
+            return None
         
-        # Update consecutive counts
-        for zone in ['evaporator', 'condenser', 'ambient']:
-            is_critical = status[zone] == 'CRITICAL'
-            self._update_consecutive_count(zone, is_critical)
-        
-        # Check if we should trigger alert based on consecutive readings
-        critical_zones = [zone for zone in ['evaporator', 'condenser', 'ambient'] 
-                         if self._should_trigger_alert(zone)]
+        # Update consecutive critical counts and collect the zones that reached the trigger
+        counts = self.consecutive_critical_count
+        required_count = self._alert_cfg['consecutive_readings_trigger']
+        critical_zones = []
+        for zone in _ZONES:
+            counts[zone] = counts.get(zone, 0) + 1 if status[zone] == 'CRITICAL' else 0
+            if counts[zone] >= required_count:
+                critical_zones.append(zone)
         
         if not critical_zones:
-            return False
+            return None
         
         # Check cooldown for overall critical status
         alert_key = 'critical_temp_alert'
         if not self._can_send_alert(alert_key):
-            return False
+            return None
         
-        try:
-            # Create email message
-            msg = self._create_alert_email(reading, status)
-            
-            # Connect to SMTP server
-            smtp_server = self.config.get('email_config', 'smtp_server')
-            smtp_port = self.config.get('email_config', 'smtp_port')
-            use_tls = self.config.get('email_config', 'use_tls')
-            
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            
-            if use_tls:
-                server.starttls()
-            
-            # Login
-            sender_email = self.config.get('email_config', 'sender_email')
-            sender_password = self._get_smtp_password()
-            server.login(sender_email, sender_password)
-            
-            # Send email
-            recipients = self.config.get('email_config', 'recipient_emails')
-            server.send_message(msg)
-            server.quit()
+        self.last_alert_time[alert_key] = time.monotonic()
+        return self._create_alert_email(reading, status, critical_zones)
+    
+    def deliver_alert(self, msg: MIMEMultipart):
+        """
+        Send an alert email built by prepare_alert over a fresh connection
+        
+        Args:
+            msg: Email message to send
             
-            # Update last alert time
-            self.last_alert_time[alert_key] = datetime.now(ZoneInfo("America/Sao_Paulo"))
+        Raises:
+            smtplib.SMTPException or OSError if the message could not be sent
+        """
+        recipients = self._email_cfg['recipient_emails']
+        self._send_message(msg, self._email_cfg['sender_email'], recipients)
+        print(f"E-mail de alerta enviado com sucesso para {len(recipients)} destinatário(s)")
+    
+    def send_alert(self, reading: Dict, status: Dict) -> bool:
+        """
+        Send email alert for critical temperature condition
+        
+        Args:
+            reading: Temperature reading data
+            status: Status information for all zones
             
-            print(f"E-mail de alerta enviado com sucesso para {len(recipients)} destinatário(s)")
+        Returns:
+            True if email sent successfully, False otherwise
+        """
+        msg = self.prepare_alert(reading, status)
+        if msg is None:
+            return False
+        
+        try:
+            self.deliver_alert(msg)
             return True
-            
         except Exception as e:
             print(f"Falha ao enviar e-mail de alerta: {e}")
             return False
@@ -331,18 +392,8 @@ Este é um alerta automático do Sistema de Monitoramento de Freezer FAST BOMBAS
             return False, "Configuração de e-mail incompleta. Por favor, configure o e-mail remetente, senha e destinatários."
         
         try:
-            smtp_server = self.config.get('email_config', 'smtp_server')
-            smtp_port = self.config.get('email_config', 'smtp_port')
-            use_tls = self.config.get('email_config', 'use_tls')
-            
-            server = smtplib.SMTP(smtp_server, smtp_port, timeout=10)
-            
-            if use_tls:
-                server.starttls()
-            
-            sender_email = self.config.get('email_config', 'sender_email')
-            sender_password = self._get_smtp_password()
-            server.login(sender_email, sender_password)
+            # Always a fresh connection, so the test really exercises login
+            server = self._connect()
             server.quit()
             
             return True, "Conexão de e-mail bem-sucedida!"
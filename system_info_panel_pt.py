@@ -4,6 +4,7 @@ Exibe status do sistema, diagnósticos e informações
 """
 
 import streamlit as st
+import pandas as pd
 from zoneinfo import ZoneInfo
 from datetime import datetime
 import os
@@ -12,11 +13,104 @@ from data_simulator import TemperatureSimulator
 from email_notifier import EmailNotifier
 from data_logger import DataLogger
 
-def show_system_info_panel(config: ConfigManager, simulator: TemperatureSimulator, 
-                           notifier: EmailNotifier, logger: DataLogger):
-    """Exibir informações do sistema e diagnósticos"""
-    st.title("ℹ️ Informações do Sistema")
-    st.markdown("Status do sistema, diagnósticos e informações técnicas")
+# Os valores são lidos direto de config.config: o ConfigManager sempre mescla a
+# configuração com os padrões ao carregar e importar (uma seção inválida mantém
+# os padrões), então todas as chaves padrão existem mesmo com um arquivo incompleto
+
+# Nomes das zonas de temperatura exibidos no painel
+ZONE_NAMES = {'evaporator': 'Evaporador', 'condenser': 'Condensador', 'ambient': 'Ambiente'}
+
+# Informações do freezer: (rótulo, chave em freezer_info)
+FREEZER_FIELDS = (
+    ("Modelo", 'model_name'),
+    ("Localização", 'location'),
+    ("Operador", 'operator_name'),
+    ("Contato", 'operator_contact')
+)
+
+# Diagnósticos: (rótulo, chave em _fs_snapshot, status quando ausente)
+DIAGNOSTIC_CHECKS = (
+    ("Arquivo de Config", 'config', "✗ Ausente"),
+    ("Diretório de Dados", 'data_dir', "⚠ Não Criado"),
+    ("Diretório de Exportação", 'exports_dir', "⚠ Não Criado"),
+    ("Arquivo de Log CSV", 'csv_exists', "⚠ Não Criado")
+)
+
+# Cor de fundo da coluna Status dos diagnósticos, pelo símbolo do status
+STATUS_BACKGROUNDS = {"✓": "#d4edda", "⚠": "#fff3cd", "✗": "#f8d7da"}
+
+def _status_style(status: str) -> str:
+    """Estilo CSS da célula de status dos diagnósticos (texto escuro também no tema escuro)"""
+    return f"background-color: {STATUS_BACKGROUNDS.get(status[:1], STATUS_BACKGROUNDS['✗'])}; color: #212529"
+
+# Texto da seção Sobre
+ABOUT_TEXT = """
+**FAST BOMBAS - Sistema de Controle Térmico de Freezer**
+
+Versão: 1.0.0
+
+Um sistema de monitoramento abrangente baseado em Python para freezers industriais com:
+- Monitoramento de temperatura em tempo real em múltiplas zonas
+- Alertas automáticos por e-mail para condições críticas
+- Registro e exportação de dados históricos
+- Limites e configurações totalmente personalizáveis
+- Interface de dashboard profissional construída com Streamlit
+
+**Componentes:**
+- Gerenciador de Configuração: Gerencia todas as configurações do sistema com persistência JSON
+- Simulador de Dados: Gera dados de temperatura realistas para testes
+- Notificador de E-mail: Envia alertas automatizados via SMTP
+- Logger de Dados: Gerencia registro CSV e dados históricos
+- Dashboard: Interface web interativa para monitoramento e controle
+
+**Requisitos do Sistema:**
+- Python 3.11+
+- Streamlit
+- Plotly
+- Pandas
+
+---
+
+*Desenvolvido para monitoramento de freezers industriais FAST BOMBAS*
+"""
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _fs_snapshot(csv_path: str) -> dict:
+    """
+    Verificar os arquivos e diretórios exibidos pelo painel
+    
+    Uma única passagem de os.scandir no diretório atual cobre o arquivo de
+    configuração e os diretórios; o log CSV recebe um os.stat próprio. O
+    resultado é reaproveitado pelas reexecuções dos próximos segundos.
+    
+    Args:
+        csv_path: Caminho do arquivo de log CSV
+        
+    Returns:
+        Dicionário com a existência de cada item e o tamanho do log em bytes
+    """
+    snapshot = {'config': False, 'data_dir': False, 'exports_dir': False}
+    with os.scandir('.') as entries:
+        for entry in entries:
+            if entry.name == 'freezer_config.json':
+                snapshot['config'] = True
+            elif entry.name == 'data':
+                snapshot['data_dir'] = entry.is_dir()
+            elif entry.name == 'exports':
+                snapshot['exports_dir'] = entry.is_dir()
+    try:
+        snapshot['csv_size'] = os.stat(csv_path).st_size
+        snapshot['csv_exists'] = True
+    except OSError:
+        snapshot['csv_size'] = 0
+        snapshot['csv_exists'] = False
+    return snapshot
+
+@st.fragment
+def _render_system_status(config: ConfigManager, email_configured: bool):
+    """Seção de status do sistema"""
+    fs = _fs_snapshot(config.config['data_logging']['csv_file_path'])
+    csv_exists = fs['csv_exists']
     
     # Status do Sistema
     st.subheader("🔌 Status do Sistema")
@@ -24,164 +118,163 @@ def show_system_info_panel(config: ConfigManager, simulator: TemperatureSimulato
     
     with col1:
         st.metric("Configuração", "✓ Carregada")
-        config_file_exists = os.path.exists('freezer_config.json')
-        st.metric("Arquivo de Config", "✓ Encontrado" if config_file_exists else "✗ Não Encontrado")
+        st.metric("Arquivo de Config", "✓ Encontrado" if fs['config'] else "✗ Não Encontrado")
     
     with col2:
-        csv_path = config.get('data_logging', 'csv_file_path')
-        csv_exists = os.path.exists(csv_path)
         st.metric("Logger de Dados", "✓ Ativo" if csv_exists else "⚠ Sem Dados Ainda")
         if csv_exists:
-            file_size = os.path.getsize(csv_path)
-            st.metric("Tamanho do Arquivo de Log", f"{file_size / 1024:.2f} KB")
+            st.metric("Tamanho do Arquivo de Log", f"{fs['csv_size'] / 1024:.2f} KB")
     
     with col3:
-        email_configured = (
-            config.get('email_config', 'sender_email') and
-            os.environ.get('SMTP_PASSWORD') and
-            len(config.get('email_config', 'recipient_emails')) > 0
-        )
         st.metric("Alertas por E-mail", "✓ Configurado" if email_configured else "⚠ Não Configurado")
         st.metric("Simulador", "✓ Rodando")
-    
-    st.markdown("---")
-    
-    # Informações do Freezer
-    st.subheader("🏭 Informações do Freezer")
-    info_data = {
-        "Modelo": config.get('freezer_info', 'model_name'),
-        "Localização": config.get('freezer_info', 'location'),
-        "Operador": config.get('freezer_info', 'operator_name'),
-        "Contato": config.get('freezer_info', 'operator_contact'),
-    }
-    for label, value in info_data.items():
-        st.text(f"{label}: {value}")
-    
-    st.markdown("---")
+
+@st.fragment
+def _render_config_summary(config: ConfigManager, email_configured: bool):
+    """Seção de resumo da configuração"""
+    # Referência única às seções da configuração carregada
+    cfg = config.config
+    thresholds = cfg['temperature_thresholds']
+    collection_cfg = cfg['data_collection']
+    alert_cfg = cfg['alert_settings']
+    email_cfg = cfg['email_config']
+    logging_cfg = cfg['data_logging']
     
     # Resumo da Configuração
     st.subheader("⚙️ Resumo da Configuração")
     config_tabs = st.tabs(["Limites de Temperatura", "Coleta de Dados", "Alertas", "Registro"])
     
+    # Cada aba é enviada como um único elemento
     with config_tabs[0]:
-        st.markdown("**Zona do Evaporador**")
-        evap = config.get('temperature_thresholds', 'evaporator')
-        st.text(f"Faixa Normal: {evap['min']}°C a {evap['max']}°C")
-        st.text(f"Limites Críticos: {evap['critical_low']}°C a {evap['critical_high']}°C")
-        st.markdown("**Zona do Condensador**")
-        cond = config.get('temperature_thresholds', 'condenser')
-        st.text(f"Faixa Normal: {cond['min']}°C a {cond['max']}°C")
-        st.text(f"Limites Críticos: {cond['critical_low']}°C a {cond['critical_high']}°C")
-        st.markdown("**Zona Ambiente**")
-        amb = config.get('temperature_thresholds', 'ambient')
-        st.text(f"Faixa Normal: {amb['min']}°C a {amb['max']}°C")
-        st.text(f"Limites Críticos: {amb['critical_low']}°C a {amb['critical_high']}°C")
+        evap = thresholds['evaporator']
+        cond = thresholds['condenser']
+        amb = thresholds['ambient']
+        st.markdown(
+            f"**Zona do Evaporador**  \n"
+            f"Faixa Normal: {evap['min']}°C a {evap['max']}°C  \n"
+            f"Limites Críticos: {evap['critical_low']}°C a {evap['critical_high']}°C\n\n"
+            f"**Zona do Condensador**  \n"
+            f"Faixa Normal: {cond['min']}°C a {cond['max']}°C  \n"
+            f"Limites Críticos: {cond['critical_low']}°C a {cond['critical_high']}°C\n\n"
+            f"**Zona Ambiente**  \n"
+            f"Faixa Normal: {amb['min']}°C a {amb['max']}°C  \n"
+            f"Limites Críticos: {amb['critical_low']}°C a {amb['critical_high']}°C"
+        )
     
     with config_tabs[1]:
-        st.text(f"Intervalo de Leitura: {config.get('data_collection', 'reading_interval_seconds')} segundos")
-        st.text(f"Intervalo de Atualização: {config.get('data_collection', 'chart_refresh_interval_seconds')} segundos")
-        st.text(f"Pontos de Dados do Gráfico: {config.get('data_collection', 'max_data_points_display')}")
+        st.text(
+            f"Intervalo de Leitura: {collection_cfg['reading_interval_seconds']} segundos\n"
+            f"Intervalo de Atualização: {collection_cfg['chart_refresh_interval_seconds']} segundos\n"
+            f"Pontos de Dados do Gráfico: {collection_cfg['max_data_points_display']}"
+        )
     
     with config_tabs[2]:
-        alerts_enabled = "Ativado" if config.get('alert_settings', 'enable_email_alerts') else "Desativado"
-        st.text(f"Alertas por E-mail: {alerts_enabled}")
-        st.text(f"Tempo de Espera de Alerta: {config.get('alert_settings', 'alert_cooldown_seconds')} segundos")
-        st.text(f"Limite de Acionamento: {config.get('alert_settings', 'consecutive_readings_trigger')} leituras")
+        alerts_enabled = "Ativado" if alert_cfg['enable_email_alerts'] else "Desativado"
+        lines = [
+            f"Alertas por E-mail: {alerts_enabled}",
+            f"Tempo de Espera de Alerta: {alert_cfg['alert_cooldown_seconds']} segundos",
+            f"Limite de Acionamento: {alert_cfg['consecutive_readings_trigger']} leituras"
+        ]
         if email_configured:
-            st.text(f"Servidor SMTP: {config.get('email_config', 'smtp_server')}:{config.get('email_config', 'smtp_port')}")
-            st.text(f"Remetente: {config.get('email_config', 'sender_email')}")
-            st.text(f"Destinatários: {len(config.get('email_config', 'recipient_emails'))}")
+            lines.append(f"Servidor SMTP: {email_cfg['smtp_server']}:{email_cfg['smtp_port']}")
+            lines.append(f"Remetente: {email_cfg['sender_email']}")
+            lines.append(f"Destinatários: {len(email_cfg['recipient_emails'])}")
+        st.text("\n".join(lines))
     
     with config_tabs[3]:
-        logging_enabled = "Ativado" if config.get('data_logging', 'enable_csv_logging') else "Desativado"
-        st.text(f"Registro CSV: {logging_enabled}")
-        st.text(f"Arquivo de Log: {config.get('data_logging', 'csv_file_path')}")
-        st.text(f"Retenção: {config.get('data_logging', 'retention_days')} dias")
-    
-    st.markdown("---")
+        logging_enabled = "Ativado" if logging_cfg['enable_csv_logging'] else "Desativado"
+        st.text(
+            f"Registro CSV: {logging_enabled}\n"
+            f"Arquivo de Log: {logging_cfg['csv_file_path']}\n"
+            f"Retenção: {logging_cfg['retention_days']} dias"
+        )
+
+@st.fragment
+def _render_simulator_status(config: ConfigManager, simulator: TemperatureSimulator):
+    """Seção de status do simulador"""
+    sim_cfg = config.config['simulation']
     
     # Status do Simulador
     st.subheader("🔬 Status do Simulador")
     col1, col2 = st.columns(2)
     
     with col1:
-        st.text(f"Modo de Falha: {'Ativo' if simulator.failure_mode else 'Inativo'}")
-        st.text(f"Probabilidade de Falha: {config.get('simulation', 'failure_probability') * 100}%")
-        st.text(f"Duração da Falha: {config.get('simulation', 'failure_duration_seconds')}s")
+        st.text(
+            f"Modo de Falha: {'Ativo' if simulator.failure_mode else 'Inativo'}\n"
+            f"Probabilidade de Falha: {sim_cfg['failure_probability'] * 100}%\n"
+            f"Duração da Falha: {sim_cfg['failure_duration_seconds']}s"
+        )
     
     with col2:
-        st.text(f"Faixa Normal: {config.get('simulation', 'normal_temp_evaporator_min')}°C a {config.get('simulation', 'normal_temp_evaporator_max')}°C")
-        st.text(f"Variação de Temperatura: ±{config.get('simulation', 'temp_variation_range')}°C")
+        st.text(
+            f"Faixa Normal: {sim_cfg['normal_temp_evaporator_min']}°C a {sim_cfg['normal_temp_evaporator_max']}°C\n"
+            f"Variação de Temperatura: ±{sim_cfg['temp_variation_range']}°C"
+        )
     
     st.markdown("**Últimas Temperaturas Registradas:**")
-    for zone, temp in simulator.last_temperatures.items():
-        zone_names = {'evaporator': 'Evaporador', 'condenser': 'Condensador', 'ambient': 'Ambiente'}
-        st.text(f"{zone_names.get(zone, zone.capitalize())}: {temp:.2f}°C")
+    st.text("\n".join(
+        f"{ZONE_NAMES.get(zone, zone.capitalize())}: {temp:.2f}°C"
+        for zone, temp in simulator.last_temperatures.items()
+    ))
     
     if st.button("Redefinir Simulador", key="reset_simulator"):
         simulator.reset_simulator()
         st.success("✓ Simulador redefinido para estado inicial")
-    
-    st.markdown("---")
+
+@st.fragment
+def _render_diagnostics(config: ConfigManager):
+    """Seção de diagnósticos do sistema"""
+    fs = _fs_snapshot(config.config['data_logging']['csv_file_path'])
     
     # Diagnósticos do Sistema
     st.subheader("🔍 Diagnósticos do Sistema")
-    diagnostics = {
-        "Arquivo de Config": "✓ OK" if os.path.exists('freezer_config.json') else "✗ Ausente",
-        "Diretório de Dados": "✓ OK" if os.path.exists('data') else "⚠ Não Criado",
-        "Diretório de Exportação": "✓ OK" if os.path.exists('exports') else "⚠ Não Criado",
-        "Arquivo de Log CSV": "✓ OK" if csv_exists else "⚠ Não Criado",
-    }
-    
-    for check, status in diagnostics.items():
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.text(check)
-        with col2:
-            if "✓" in status:
-                st.success(status)
-            elif "⚠" in status:
-                st.warning(status)
-            else:
-                st.error(status)
+    diagnostics = pd.DataFrame(
+        [(check, "✓ OK" if fs[key] else missing) for check, key, missing in DIAGNOSTIC_CHECKS],
+        columns=["Verificação", "Status"]
+    )
+    st.dataframe(
+        diagnostics.style.map(_status_style, subset=["Status"]),
+        hide_index=True,
+        use_container_width=True
+    )
+
+def show_system_info_panel(config: ConfigManager, simulator: TemperatureSimulator, 
+                           notifier: EmailNotifier, logger: DataLogger):
+    """Exibir informações do sistema e diagnósticos"""
+    st.title("ℹ️ Informações do Sistema")
+    st.markdown("Status do sistema, diagnósticos e informações técnicas")
+    
+    # Mesma verificação usada pelo notificador antes de enviar um alerta
+    email_configured = notifier._is_configured()
+    
+    # Cada seção é um fragment: o botão do simulador reexecuta só a sua seção
+    _render_system_status(config, email_configured)
     
     st.markdown("---")
     
-    # Seção Sobre
-    st.subheader("📖 Sobre")
-    st.markdown("""
-    **FAST BOMBAS - Sistema de Controle Térmico de Freezer**
+    # Informações do Freezer
+    st.subheader("🏭 Informações do Freezer")
+    freezer_cfg = config.config['freezer_info']
+    st.text("\n".join(f"{label}: {freezer_cfg[key]}" for label, key in FREEZER_FIELDS))
     
-    Versão: 1.0.0
+    st.markdown("---")
     
-    Um sistema de monitoramento abrangente baseado em Python para freezers industriais com:
-    - Monitoramento de temperatura em tempo real em múltiplas zonas
-    - Alertas automáticos por e-mail para condições críticas
-    - Registro e exportação de dados históricos
-    - Limites e configurações totalmente personalizáveis
-    - Interface de dashboard profissional construída com Streamlit
+    _render_config_summary(config, email_configured)
     
-    **Componentes:**
-    - Gerenciador de Configuração: Gerencia todas as configurações do sistema com persistência JSON
-    - Simulador de Dados: Gera dados de temperatura realistas para testes
-    - Notificador de E-mail: Envia alertas automatizados via SMTP
-    - Logger de Dados: Gerencia registro CSV e dados históricos
-    - Dashboard: Interface web interativa para monitoramento e controle
+    st.markdown("---")
     
-    **Requisitos do Sistema:**
-    - Python 3.11+
-    - Streamlit
-    - Plotly
-    - Pandas
+    _render_simulator_status(config, simulator)
     
-    ---
+    st.markdown("---")
     
-    *Desenvolvido para monitoramento de freezers industriais FAST BOMBAS*
-    """)
+    _render_diagnostics(config)
     
     st.markdown("---")
     
+    # Seção Sobre, recolhida por padrão como os metadados
+    with st.expander("📖 Sobre"):
+        st.markdown(ABOUT_TEXT)
+    
     # Metadados do Sistema
     with st.expander("📋 Metadados do Sistema"):
-        metadata = config.get('system_metadata')
-        st.json(metadata)
+        st.json(config.config['system_metadata'])